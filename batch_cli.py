@@ -0,0 +1,285 @@
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+import plate_recognition
+from frame_capture import open_video_capture
+from plate_utils import STAGES, StageTimer, append_checkpoint, load_checkpoint, truncate_partial_line
+
+VIDEO_EXTS = ['.mp4', '.avi', '.mov', '.mkv']
+MEDIA_EXTS = plate_recognition.IMAGE_EXTS + VIDEO_EXTS
+
+CSV_COLUMNS = ["path", "frame", "time", "plate", "confidence", "box", "elapsed"] + list(STAGES)
+
+
+# -------------------------------
+# 输入收集
+# -------------------------------
+def collect_inputs(inputs, recursive=False):
+    """
+    把文件、目录、通配符展开为待处理的图片/视频列表 (绝对路径，去重后保持输入顺序)
+    目录只取其中的图片和视频文件，recursive 为 True 时包含子目录
+    """
+    paths = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            candidates = sorted(glob.glob(pattern, recursive=recursive))
+        elif os.path.isfile(item):
+            candidates = [item]
+        else:
+            candidates = sorted(glob.glob(item, recursive=True))
+            if not candidates:
+                print(f"[警告] 没有匹配的文件: {item}")
+        for path in candidates:
+            if not os.path.isfile(path) or os.path.splitext(path)[1].lower() not in MEDIA_EXTS:
+                continue
+            path = os.path.abspath(path)
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+# -------------------------------
+# 子进程函数
+# -------------------------------
+def _check_readable(path):
+    """ 文件无法解码/打开时抛出 IOError (iter_source 对这类文件只打印错误，不产出事件) """
+    if os.path.splitext(path)[1].lower() in plate_recognition.IMAGE_EXTS:
+        readable = cv2.imread(path) is not None
+    else:
+        cap = open_video_capture(path)
+        readable = cap.isOpened()
+        cap.release()
+    if not readable:
+        raise IOError(f"无法读取文件: {path}")
+
+
+def process_file(path, frame_skip=5, scan_mode="grab", detect_width=None):
+    """
+    识别一个图片或视频文件 (在子进程中运行)，不绘制也不保存标注图
+    无法读取的文件抛出 IOError，计为失败且不写入断点，下次运行会重试
+    输出: {"path", "size", "mtime", "events": [{"frame", "time", "plate", "confidence", "box"}, ...], "timing"}
+    """
+    timer = StageTimer(path)
+    events = []
+    for event in plate_recognition.iter_source(path, save_path=None, frame_skip=frame_skip, scan_mode=scan_mode,
+                                               detect_width=detect_width, timer=timer):
+        events.append({
+            "frame": event.frame_index,
+            "time": round(event.timestamp, 3) if event.timestamp is not None else None,
+            "plate": event.plate,
+            "confidence": round(event.confidence, 4),
+            "box": [int(v) for v in event.box],
+        })
+    timer.stop()
+    if not events:
+        # 只在没有识别结果时再确认一次可读性，正常文件不多解码一遍
+        _check_readable(path)
+    stat = os.stat(path)
+    return {"path": path, "size": stat.st_size, "mtime": stat.st_mtime, "events": events,
+            "timing": timer.as_dict()}
+
+
+# -------------------------------
+# 结果输出与断点续传
+# -------------------------------
+class ResultWriter:
+    """
+    逐行写出识别结果 (JSONL 或 CSV)，每个文件处理完立即落盘
+    没有识别到车牌的文件也写一行 (车牌相关字段为空)，其耗时同样保留在结果中
+    """
+
+    def __init__(self, path, fmt="jsonl", append=False):
+        self.fmt = fmt
+        exists = append and os.path.exists(path) and os.path.getsize(path) > 0
+        # utf-8-sig 便于 Excel 直接打开中文路径；追加时不会重复写入 BOM
+        encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+        self._file = open(path, "a" if append else "w", newline="" if fmt == "csv" else None, encoding=encoding)
+        self._csv = csv.writer(self._file) if fmt == "csv" else None
+        if self._csv is not None and not exists:
+            self._csv.writerow(CSV_COLUMNS)
+
+    def write(self, result):
+        timing = result["timing"]
+        empty = {"frame": None, "time": None, "plate": None, "confidence": None, "box": None}
+        for event in result["events"] or [empty]:
+            if self._csv is not None:
+                box = ",".join(str(v) for v in event["box"]) if event["box"] is not None else ""
+                self._csv.writerow([result["path"], event["frame"], event["time"], event["plate"],
+                                    event["confidence"], box, timing["total"]]
+                                   + [timing["stages"].get(name, "") for name in STAGES])
+            else:
+                record = dict(path=result["path"], **event, elapsed=timing["total"], stages=timing["stages"])
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _checkpoint_header(fmt, frame_skip, scan_mode, detect_width, detect_level):
+    return {"format": fmt, "frame_skip": frame_skip, "scan_mode": scan_mode, "detect_width": detect_width,
+            "detect_level": int(detect_level)}
+
+
+def _unchanged(path, size, mtime):
+    """ 文件自上次处理后未被修改 (修改过的文件需要重新识别) """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_size == size and stat.st_mtime == mtime
+
+
+def _trim_output(output, fmt, keep):
+    """
+    续传前去掉输出文件中不属于已完成文件的行
+    (中断时正在写的文件、或已被修改需要重新识别的文件)，避免重复
+    """
+    if not os.path.exists(output):
+        return
+    truncate_partial_line(output)
+    encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+    with open(output, "r", newline="" if fmt == "csv" else None, encoding=encoding) as f:
+        if fmt == "csv":
+            rows = [row for row in csv.reader(f)]
+            kept = rows[:1] + [row for row in rows[1:] if row and row[0] in keep]
+            removed = len(rows) - len(kept)
+        else:
+            lines = f.read().splitlines()
+            kept = []
+            for line in lines:
+                try:
+                    if json.loads(line)["path"] in keep:
+                        kept.append(line)
+                except (ValueError, KeyError):
+                    continue
+            removed = len(lines) - len(kept)
+    if not removed:
+        return
+    tmp = output + ".tmp"
+    with open(tmp, "w", newline="" if fmt == "csv" else None, encoding=encoding) as f:
+        if fmt == "csv":
+            csv.writer(f).writerows(kept)
+        else:
+            f.writelines(line + "\n" for line in kept)
+    os.replace(tmp, output)
+    print(f"[信息] 已从输出中去掉 {removed} 行未完成的结果")
+
+
+def run_batch(paths, output, fmt="jsonl", workers=1, frame_skip=5, scan_mode="grab", detect_width=None,
+              checkpoint=None, detect_level=plate_recognition.lpr3.DETECT_LEVEL_LOW):
+    """
+    批量识别图片/视频文件，结果逐个文件写入 output
+    输入:
+        workers: 进程数，每个进程独立加载识别引擎并处理整个文件；1 表示在当前进程中顺序处理
+        checkpoint: 断点文件路径 (JSONL)，每完成一个文件追加一行；重新运行时跳过已完成且未修改的文件，
+                    输出文件改为追加
+    输出: {"files", "skipped", "failed", "plates", "seconds"}
+    """
+    header = _checkpoint_header(fmt, frame_skip, scan_mode, detect_width, detect_level)
+    records = load_checkpoint(checkpoint, header)
+    fresh = not records
+    # 已完成的文件 {path: (size, mtime)}，自上次处理后被修改的文件重新识别
+    done = {r["path"]: (r["size"], r["mtime"]) for r in records or []}
+    done = {path: stat for path, stat in done.items() if _unchanged(path, *stat)}
+    pending = [path for path in paths if path not in done]
+    skipped = len(paths) - len(pending)
+    workers = max(1, min(int(workers or 1), len(pending) or 1))
+    print(f"[信息] 共 {len(paths)} 个文件, 已完成 {skipped} 个, 使用 {workers} 个进程")
+
+    checkpoint_file = None
+    if checkpoint:
+        if not fresh:
+            _trim_output(output, fmt, set(done))
+        checkpoint_file = open(checkpoint, "w" if fresh else "a", encoding="utf-8")
+        if fresh:
+            append_checkpoint(checkpoint_file, header)
+    writer = ResultWriter(output, fmt, append=checkpoint_file is not None and not fresh)
+
+    start_time = time.perf_counter()
+    finished = failed = plates = 0
+
+    def _record(result):
+        nonlocal finished, plates
+        writer.write(result)
+        if checkpoint_file is not None:
+            append_checkpoint(checkpoint_file, {"path": result["path"], "size": result["size"],
+                                                 "mtime": result["mtime"], "plates": len(result["events"])})
+        finished += 1
+        plates += len(result["events"])
+        print(f"[{finished + failed}/{len(pending)}] {result['path']} | 车牌 {len(result['events'])} 个 | "
+              f"耗时 {result['timing']['total']:.2f}秒")
+
+    try:
+        if not pending:
+            # 全部已完成时直接结束，不加载识别模型
+            print("[信息] 没有需要处理的文件")
+        elif workers == 1:
+            plate_recognition.init_engine(1, detect_level=detect_level)
+            for path in pending:
+                try:
+                    _record(process_file(path, frame_skip, scan_mode, detect_width))
+                except Exception as e:
+                    failed += 1
+                    print(f"[错误] 处理失败: {path}: {e}")
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=plate_recognition.init_engine, initargs=(1, detect_level)) as executor:
+                futures = {executor.submit(process_file, path, frame_skip, scan_mode, detect_width): path
+                           for path in pending}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"[错误] 处理失败: {futures[future]}: {e}")
+                        continue
+                    _record(result)
+    finally:
+        writer.close()
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    summary = {"files": finished, "skipped": skipped, "failed": failed, "plates": plates,
+               "seconds": round(time.perf_counter() - start_time, 3)}
+    print(f"[信息] 批量识别完成: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面批量识别图片/视频中的车牌，结果输出为 JSONL 或 CSV")
+    parser.add_argument("inputs", nargs="+", help="图片/视频文件、目录或通配符 (如 'captures/**/*.mp4')")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl",
+                        help="结果文件，扩展名为 .csv 时输出 CSV，否则输出 JSONL")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="指定输出格式 (默认按扩展名)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="进程数")
+    parser.add_argument("-r", "--recursive", action="store_true", help="目录包含子目录")
+    parser.add_argument("--frame-skip", type=int, default=5, help="视频每隔多少帧识别一次")
+    parser.add_argument("--scan-mode", choices=["decode", "grab", "seek"], default="grab", help="视频抽帧方式")
+    parser.add_argument("--detect-width", type=int, default=None, help="检测模型输入的最大宽度")
+    parser.add_argument("--checkpoint", default=None, help="断点文件 (JSONL)，中断后重新运行可续传")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    paths = collect_inputs(args.inputs, args.recursive)
+    if not paths:
+        print("[错误] 没有可处理的图片或视频文件")
+        return 1
+    summary = run_batch(paths, args.output, fmt=fmt, workers=args.workers, frame_skip=args.frame_skip,
+                        scan_mode=args.scan_mode, detect_width=args.detect_width, checkpoint=args.checkpoint)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
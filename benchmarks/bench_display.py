@@ -0,0 +1,65 @@
+"""
+实时显示 Tk 线程耗时对比: 每帧新建 PhotoImage vs DisplaySurface 复用并 paste
+测量把一帧 RGB 图像显示到 Label 上 (含 Tk 重绘) 的 Tk 线程耗时，需要图形界面环境。
+用法: python benchmarks/bench_display.py [-n 帧数] [--sizes 640x360 1280x720]
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+import numpy as np
+from PIL import Image, ImageTk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui_display import DisplaySurface  # noqa: E402
+
+
+def make_frames(width, height, count=8):
+    """ 预先生成几帧不同内容的 RGB 图像，避免测到生成开销 """
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def show_new_photo(label, frame):
+    """ 原实现: 每帧新建 PhotoImage 并替换 """
+    imgtk = ImageTk.PhotoImage(image=Image.fromarray(frame))
+    label.configure(image=imgtk, text="")
+    label.image = imgtk
+
+
+def bench(root, show, frames, repeat):
+    show(frames[0])  # 预热
+    root.update()
+    start = time.perf_counter()
+    for i in range(repeat):
+        show(frames[i % len(frames)])
+        root.update()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeat", type=int, default=200)
+    parser.add_argument("--sizes", nargs="+", default=["640x360", "1280x720", "1920x1080"])
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    label = tk.Label(root)
+    label.pack()
+
+    print(f"{'尺寸':<12s} {'新建 PhotoImage':>16s} {'DisplaySurface':>16s}")
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        frames = make_frames(width, height)
+        legacy = bench(root, lambda f: show_new_photo(label, f), frames, args.repeat)
+        surface = DisplaySurface(label)
+        reused = bench(root, surface.show, frames, args.repeat)
+        print(f"{size:<12s} {legacy:13.2f} ms {reused:13.2f} ms   (分配 {surface.allocations} 次)")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
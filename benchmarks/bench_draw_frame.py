@@ -0,0 +1,81 @@
+"""
+draw_frame 性能对比: 旧的 PIL 整帧转换路径 vs PlateRenderer
+用法: python benchmarks/bench_draw_frame.py [图片路径] [-n 次数]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plate_recognition import PlateRenderer, load_font  # noqa: E402
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "plate_test_file", "images", "2.jpg")
+RESULTS = [("京A88888", [800, 600, 1040, 680]), ("粤C11111", [200, 300, 440, 380])]
+
+
+def legacy_draw_frame(frame, results):
+    """ 原 draw_frame 实现: 每次调用都查找并加载字体，整帧经 PIL 转换 """
+    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    pil_img = Image.fromarray(img_rgb)
+    draw = ImageDraw.Draw(pil_img)
+    font = load_font(22)
+    for code, box in results:
+        x1, y1, x2, y2 = map(int, box)
+        draw.rectangle([x1, y1, x2, y2], outline="lime", width=3)
+        draw.text((x1, max(y1 - 25, 0)), code, fill="lime", font=font)
+    return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+
+
+def bench(name, fn, frame, repeat):
+    fn(frame)  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(frame)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def report(name, per_call):
+    print(f"{name:<28s} {per_call:8.2f} ms/帧")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("image", nargs="?", default=DEFAULT_IMAGE)
+    parser.add_argument("-n", "--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    img = cv2.imread(args.image)
+    if img is None:
+        print("[错误] 无法读取图片:", args.image)
+        return
+    frame = cv2.resize(img, (1920, 1080))
+    renderer = PlateRenderer()
+
+    # 屏蔽旧实现每次调用打印的字体信息
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    try:
+        legacy = bench("旧实现 (PIL 整帧)", lambda f: legacy_draw_frame(f, RESULTS), frame, args.repeat)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+    cached = bench("PlateRenderer (全分辨率)", lambda f: renderer.draw(f, RESULTS), frame, args.repeat)
+    display = bench("PlateRenderer (显示尺寸)",
+                    lambda f: renderer.draw(f, RESULTS, display_size=(640, 360)), frame, args.repeat)
+
+    print(f"测试图像: {args.image} (缩放至 1920x1080), 重复 {args.repeat} 次")
+    report("旧实现 (PIL 整帧)", legacy)
+    report("PlateRenderer (全分辨率)", cached)
+    report("PlateRenderer (显示尺寸)", display)
+    print(f"加速比: 全分辨率 {legacy / cached:.1f}x, 显示尺寸 {legacy / display:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
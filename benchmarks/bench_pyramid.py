@@ -0,0 +1,108 @@
+"""
+分辨率金字塔对比: 不同检测宽度下的识别耗时与准确率
+以原图识别结果作为参考 (或 --labels 指定的人工标注)，在 plate_test_file 的图片和视频抽帧上逐一比较，
+用于为每路摄像头选择合适的 detect_width。
+用法: python benchmarks/bench_pyramid.py [--widths 1280 960 640] [--video-step 25] [--labels labels.json]
+labels.json 格式: {"2.jpg": ["京A88888"], "1.mp4#125": ["粤B12345"], ...}
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plate_recognition import init_engine, recognize_frame  # noqa: E402
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plate_test_file")
+
+
+def load_samples(video_step, max_video_frames):
+    """ 读取测试图片和视频抽帧，输出 [(名称, 帧), ...] """
+    samples = []
+    for path in sorted(glob.glob(os.path.join(TEST_DIR, "images", "*"))):
+        img = cv2.imread(path)
+        if img is not None:
+            samples.append((os.path.basename(path), img))
+    for path in sorted(glob.glob(os.path.join(TEST_DIR, "video", "*"))):
+        cap = cv2.VideoCapture(path)
+        index, taken = 0, 0
+        while taken < max_video_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            index += 1
+            if index % video_step == 0:
+                samples.append((f"{os.path.basename(path)}#{index}", frame))
+                taken += 1
+        cap.release()
+    return samples
+
+
+def run(samples, detect_width, repeat):
+    """ 输出 ({名称: [车牌, ...]}, 平均耗时 ms) """
+    plates = {}
+    elapsed = 0.0
+    for name, frame in samples:
+        recognize_frame(frame, detect_width=detect_width)  # 预热
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results = recognize_frame(frame, detect_width=detect_width)
+        elapsed += (time.perf_counter() - start) / repeat
+        plates[name] = sorted(code for code, _ in results)
+    return plates, elapsed / max(1, len(samples)) * 1000
+
+
+def score(plates, reference):
+    """ 召回率 (参考车牌中被正确读出的比例) 与完全一致的样本比例 """
+    expected = found = exact = 0
+    for name, ref in reference.items():
+        got = list(plates.get(name, []))
+        expected += len(ref)
+        for code in ref:
+            if code in got:
+                got.remove(code)
+                found += 1
+        exact += sorted(plates.get(name, [])) == sorted(ref)
+    return (found / expected if expected else 1.0), exact / max(1, len(reference))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--widths", type=int, nargs="+", default=[1280, 960, 800, 640, 480])
+    parser.add_argument("--video-step", type=int, default=25, help="视频每隔多少帧取一帧")
+    parser.add_argument("--max-video-frames", type=int, default=20, help="每个视频最多取多少帧")
+    parser.add_argument("--labels", default=None, help="人工标注 JSON，不指定时以原图识别结果为参考")
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = load_samples(args.video_step, args.max_video_frames)
+    if not samples:
+        print("[错误] 没有可用的测试样本:", TEST_DIR)
+        return
+    init_engine(1)
+
+    baseline, baseline_ms = run(samples, None, args.repeat)
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            reference = {name: sorted(codes) for name, codes in json.load(f).items()}
+    else:
+        reference = baseline
+
+    print(f"样本 {len(samples)} 个 (图片 + 视频抽帧)，参考: {'人工标注' if args.labels else '原图识别结果'}")
+    print(f"{'检测宽度':<10s} {'耗时 ms/帧':>10s} {'加速':>6s} {'召回率':>7s} {'完全一致':>8s}")
+    rows = [("原图", baseline, baseline_ms)]
+    for width in args.widths:
+        plates, ms = run(samples, width, args.repeat)
+        rows.append((str(width), plates, ms))
+    for label, plates, ms in rows:
+        recall, exact = score(plates, reference)
+        print(f"{label:<12s} {ms:10.1f} {baseline_ms / ms:6.2f}x {recall:7.1%} {exact:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
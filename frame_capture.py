@@ -0,0 +1,180 @@
+import sys
+import threading
+import time
+
+import cv2
+
+
+def open_video_capture(source):
+    """ 打开摄像头/视频源 (Windows 摄像头使用 DirectShow) """
+    if isinstance(source, int) and sys.platform.startswith("win"):
+        return cv2.VideoCapture(source, cv2.CAP_DSHOW)
+    return cv2.VideoCapture(source)
+
+
+class LatestFrameSlot:
+    """
+    最新帧槽位
+    只保存最新一帧，订阅方按自己的节奏读取；上一帧未被读走就被新帧替换时计为丢帧。
+    max_fps 限制该订阅方接收帧的频率 (None 表示不限)。
+    """
+
+    def __init__(self, name, max_fps=None):
+        self.name = name
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self._cond = threading.Condition()
+        self._item = None  # (seq, timestamp, frame)
+        self._unread = False
+        self._last_publish = 0.0
+        self._closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.frame_age = 0.0  # 取帧时距采集的时间 (秒)，指数滑动平均
+
+    def publish(self, seq, timestamp, frame):
+        if self.min_interval and timestamp - self._last_publish < self.min_interval:
+            return
+        with self._cond:
+            if self._unread:
+                self.dropped += 1
+            self._item = (seq, timestamp, frame)
+            self._unread = True
+            self._last_publish = timestamp
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        取最新帧
+        输入: timeout 0 表示不等待, None 表示一直等到有新帧
+        输出: (seq, timestamp, frame)，没有新帧时返回 None
+        """
+        with self._cond:
+            if not self._unread and timeout != 0 and not self._closed:
+                self._cond.wait(timeout)
+            if not self._unread:
+                return None
+            self._unread = False
+            age = max(0.0, time.time() - self._item[1])
+            self.frame_age = age if not self.delivered else self.frame_age * 0.9 + age * 0.1
+            self.delivered += 1
+            return self._item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        return {"delivered": self.delivered, "dropped": self.dropped, "age_ms": self.frame_age * 1000}
+
+
+class CaptureThread:
+    """
+    单一采集线程
+    独占一个 VideoCapture，持续读帧并带上序号和时间戳分发给各订阅方 (显示、识别、录像…)，
+    各订阅方通过自己的 LatestFrameSlot 以不同频率取最新帧，互不抢帧，Tk 线程也不再阻塞在 read() 上。
+    attach_ring() 后采集线程同时把每帧写入共享内存帧缓冲，识别子进程直接在槽位上读取。
+    """
+
+    auto_reconnect = False  # 为 True 时首次打开失败也可 start()，由采集线程在后台连接
+
+    def __init__(self, source=0):
+        self.source = source
+        self.cap = None
+        self.seq = 0
+        self._subscribers = {}
+        self._thread = None
+        self._running = False
+        self._fps = 0.0
+        self._last_ts = None
+        self.ring = None  # SharedFrameRing，由采集线程写入
+        self._cap_lock = threading.Lock()  # read() 与 stop() 中的 release() 互斥
+
+    def open(self):
+        """ 打开采集源 输出: 是否成功 """
+        self.cap = open_video_capture(self.source)
+        return self.cap.isOpened()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id) if self.cap is not None else 0
+
+    def subscribe(self, name, max_fps=None):
+        """ 注册订阅方 输出: LatestFrameSlot """
+        slot = LatestFrameSlot(name, max_fps)
+        self._subscribers[name] = slot
+        return slot
+
+    def attach_ring(self, ring):
+        """ 采集线程把每帧写入共享内存帧缓冲 (写入发生在采集线程上，识别端不再复制整帧) """
+        self.ring = ring
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        if self.cap is None and not self.open():
+            raise RuntimeError(f"无法打开视频源: {self.source}")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            with self._cap_lock:
+                # stop() 可能在上一次 read() 阻塞期间已释放设备
+                if self.cap is None:
+                    break
+                ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self._publish(frame)
+
+    def _publish(self, frame, timestamp=None):
+        """ 给帧编号、打时间戳 (默认取当前时间) 并分发给所有订阅方 """
+        now = time.time() if timestamp is None else timestamp
+        self.seq += 1
+        if self._last_ts is not None and now > self._last_ts:
+            # 采集帧率取指数滑动平均
+            instant = 1.0 / (now - self._last_ts)
+            self._fps = instant if not self._fps else self._fps * 0.9 + instant * 0.1
+        self._last_ts = now
+        ring = self.ring
+        if ring is not None:
+            # 先写入帧缓冲再通知订阅方，识别端被唤醒时槽位中已是这一帧
+            try:
+                ring.write(frame, now)
+            except ValueError as e:
+                # 帧尺寸超出槽位容量 (如重连后分辨率变化)：停用帧缓冲，识别端退回订阅槽位中的帧
+                print(f"[警告] {e}，停止写入共享帧缓冲")
+                self.ring = None
+        for slot in list(self._subscribers.values()):
+            slot.publish(self.seq, now, frame)
+
+    def stop(self):
+        """ 停止采集并释放设备 """
+        self._running = False
+        for slot in self._subscribers.values():
+            slot.close()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        # 读取线程仍阻塞在 read() 中时等它返回后再释放
+        with self._cap_lock:
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
+
+    @property
+    def capture_fps(self):
+        return self._fps
+
+    def stats(self):
+        return {
+            "frames": self.seq,
+            "capture_fps": self._fps,
+            "subscribers": {name: slot.stats() for name, slot in self._subscribers.items()},
+        }
@@ -0,0 +1,179 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 槽位状态
+SLOT_FREE = 0      # 空闲，可写入
+SLOT_WRITING = 1   # 采集端写入中
+SLOT_READY = 2     # 已写入，等待识别
+SLOT_READING = 3   # 识别端读取中，写入端不可覆盖
+
+# 头部字段 (int64)
+_H_SLOTS, _H_MAX_H, _H_MAX_W, _H_MAX_C, _H_WRITE_SEQ, _H_WRITTEN, _H_DROPPED, _H_OVERWRITTEN, _H_READ = range(9)
+_HEADER_FIELDS = 9
+# 每个槽位的字段 (int64)
+_S_STATE, _S_SEQ, _S_H, _S_W, _S_C, _S_TS = range(6)
+_SLOT_FIELDS = 6
+
+
+class SharedFrameRing:
+    """
+    共享内存帧环形缓冲
+    固定数量的帧槽位位于 multiprocessing.shared_memory 中，采集端只写一次，
+    识别端（线程或子进程）通过 numpy 视图原地读取，不再复制或编码帧。
+    每个槽位带有状态和递增序号：正在被读取的槽位不会被覆盖，
+    所有槽位都被占用时新帧直接丢弃并计数。
+    """
+
+    def __init__(self, shm, lock, owner):
+        self._shm = shm
+        self._lock = lock
+        self._owner = owner
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.slots = int(self._header[_H_SLOTS])
+        self.max_shape = (int(self._header[_H_MAX_H]), int(self._header[_H_MAX_W]), int(self._header[_H_MAX_C]))
+        meta_bytes = (_HEADER_FIELDS + self.slots * _SLOT_FIELDS) * 8
+        self._meta = np.ndarray((self.slots, _SLOT_FIELDS), dtype=np.int64,
+                                buffer=shm.buf, offset=_HEADER_FIELDS * 8)
+        self._frames = np.ndarray((self.slots,) + self.max_shape, dtype=np.uint8,
+                                  buffer=shm.buf, offset=meta_bytes)
+
+    @classmethod
+    def create(cls, slots=8, max_shape=(1080, 1920, 3), name=None):
+        """
+        创建环形缓冲 (由采集端调用)
+        输入: slots 槽位数, max_shape 单帧最大尺寸 (h, w, c)
+        """
+        max_shape = tuple(int(v) for v in max_shape)
+        if len(max_shape) == 2:
+            max_shape = max_shape + (1,)
+        meta_bytes = (_HEADER_FIELDS + slots * _SLOT_FIELDS) * 8
+        size = meta_bytes + slots * int(np.prod(max_shape))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_H_SLOTS] = slots
+        header[_H_MAX_H], header[_H_MAX_W], header[_H_MAX_C] = max_shape
+        meta = np.ndarray((slots, _SLOT_FIELDS), dtype=np.int64, buffer=shm.buf, offset=_HEADER_FIELDS * 8)
+        meta[:] = 0
+        del header, meta
+        # 与识别服务一致使用 spawn 上下文，锁才能随子进程创建一起传递
+        return cls(shm, multiprocessing.get_context("spawn").Lock(), owner=True)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # ---- 跨进程传递 (仅在创建子进程时可用，锁随之继承) ----
+    def __getstate__(self):
+        return {"name": self._shm.name, "lock": self._lock}
+
+    def __setstate__(self, state):
+        # spawn 子进程与父进程共用同一个 resource_tracker，附加不会导致共享内存被提前回收
+        shm = shared_memory.SharedMemory(name=state["name"])
+        self.__init__(shm, state["lock"], owner=False)
+
+    # ---- 写入端 ----
+    def write(self, frame, timestamp=None):
+        """
+        写入一帧
+        优先使用空闲槽位，否则覆盖最旧的未读帧；全部槽位都在读取中时丢弃新帧
+        输出: 帧序号, 被丢弃时返回 None
+        """
+        h, w = frame.shape[:2]
+        c = frame.shape[2] if frame.ndim == 3 else 1
+        if h > self.max_shape[0] or w > self.max_shape[1] or c != self.max_shape[2]:
+            raise ValueError(f"帧尺寸 {frame.shape} 超出槽位容量 {self.max_shape}")
+
+        with self._lock:
+            states = self._meta[:, _S_STATE]
+            free = np.flatnonzero(states == SLOT_FREE)
+            if len(free):
+                slot = int(free[0])
+            else:
+                ready = np.flatnonzero(states == SLOT_READY)
+                if not len(ready):
+                    self._header[_H_DROPPED] += 1
+                    return None
+                slot = int(ready[np.argmin(self._meta[ready, _S_SEQ])])
+                self._header[_H_OVERWRITTEN] += 1
+            self._meta[slot, _S_STATE] = SLOT_WRITING
+            self._header[_H_WRITE_SEQ] += 1
+            seq = int(self._header[_H_WRITE_SEQ])
+
+        self._frames[slot, :h, :w, :c] = frame.reshape(h, w, c)
+
+        with self._lock:
+            meta = self._meta[slot]
+            meta[_S_SEQ] = seq
+            meta[_S_H], meta[_S_W], meta[_S_C] = h, w, c
+            meta[_S_TS] = int((timestamp if timestamp is not None else time.time()) * 1e9)
+            meta[_S_STATE] = SLOT_READY
+            self._header[_H_WRITTEN] += 1
+        return seq
+
+    # ---- 读取端 ----
+    def acquire(self, latest=True, after_seq=0):
+        """
+        取出一帧并锁定其槽位
+        输入: latest True 取最新帧, False 取最旧帧; after_seq 只取序号大于该值的帧
+        输出: (slot, seq) 或 None; 读完后必须调用 release(slot)
+        """
+        with self._lock:
+            states = self._meta[:, _S_STATE]
+            seqs = self._meta[:, _S_SEQ]
+            ready = np.flatnonzero((states == SLOT_READY) & (seqs > after_seq))
+            if not len(ready):
+                return None
+            pick = np.argmax(seqs[ready]) if latest else np.argmin(seqs[ready])
+            slot = int(ready[pick])
+            self._meta[slot, _S_STATE] = SLOT_READING
+            self._header[_H_READ] += 1
+            return slot, int(seqs[slot])
+
+    def view(self, slot):
+        """ 返回槽位中帧的 numpy 视图 (不复制)，仅在 acquire 与 release 之间有效 """
+        h, w, c = (int(v) for v in self._meta[slot, _S_H:_S_C + 1])
+        frame = self._frames[slot, :h, :w, :c]
+        return frame if c > 1 else frame[:, :, 0]
+
+    def timestamp(self, slot):
+        return self._meta[slot, _S_TS] / 1e9
+
+    def seq(self, slot):
+        return int(self._meta[slot, _S_SEQ])
+
+    def release(self, slot):
+        """ 释放槽位，允许写入端复用 """
+        with self._lock:
+            self._meta[slot, _S_STATE] = SLOT_FREE
+
+    def stats(self):
+        """ 占用与丢帧统计 """
+        with self._lock:
+            states = self._meta[:, _S_STATE]
+            return {
+                "slots": self.slots,
+                "ready": int(np.count_nonzero(states == SLOT_READY)),
+                "reading": int(np.count_nonzero(states == SLOT_READING)),
+                "occupancy": float(np.count_nonzero(states != SLOT_FREE)) / self.slots,
+                "written": int(self._header[_H_WRITTEN]),
+                "read": int(self._header[_H_READ]),
+                "dropped": int(self._header[_H_DROPPED]),
+                "overwritten": int(self._header[_H_OVERWRITTEN]),
+            }
+
+    def close(self):
+        """ 关闭映射；创建者同时销毁共享内存 (先 unlink，仍有视图未释放时共享内存也不会遗留) """
+        self._header = self._meta = self._frames = None
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        try:
+            self._shm.close()
+        except BufferError as e:
+            print(f"[警告] 帧缓冲仍有视图未释放: {e}")
@@ -0,0 +1,95 @@
+import math
+import time
+from collections import deque
+
+
+class AdaptiveSampler:
+    """
+    自适应抽帧调度
+    根据实测识别耗时、目标延迟和最近是否识别到车牌决定下一次识别哪一帧，替代固定的每 5 帧一次：
+    - 有车牌时按 target_latency 的间隔密集识别 (同时不超过识别能力)
+    - 连续无车牌时间隔逐次翻倍，最长 idle_interval 秒识别一次
+    - realtime=True (摄像头) 时，间隔不小于一次识别的耗时，识别跟不上时主动丢帧而不是积压；
+      离线视频设为 False，只按内容稀疏程度调节
+    所有间隔以帧数计算，帧时间由 source_fps 换算。
+    """
+
+    def __init__(self, source_fps=25.0, target_latency=0.2, idle_interval=1.0, active_hold=2.0,
+                 realtime=True, smoothing=0.3):
+        self.source_fps = source_fps if source_fps and source_fps > 0 else 25.0
+        self.target_latency = target_latency
+        self.idle_interval = idle_interval
+        self.active_hold = active_hold
+        self.realtime = realtime
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        self.frame_index = 0
+        self.analyzed = 0
+        self.dropped = 0
+        self.latency = None  # 识别耗时的指数滑动平均 (秒)
+        self.interval = self._active_interval()
+        self._last_analyzed = 0
+        self._last_active = None
+        self._analyze_times = deque(maxlen=30)
+
+    def _active_interval(self):
+        return max(1.0, self.target_latency * self.source_fps)
+
+    def should_analyze(self, frame_index=None):
+        """
+        每读到一帧调用一次
+        输入: frame_index 源帧序号 (可选)；只取最新帧时中间未经过调度的帧按丢帧计入
+        输出: True 表示该帧需要识别
+        """
+        previous = self.frame_index
+        self.frame_index = previous + 1 if frame_index is None else max(frame_index, previous + 1)
+        self.dropped += self.frame_index - previous - 1
+        if self.frame_index - self._last_analyzed >= self.interval:
+            self._last_analyzed = self.frame_index
+            self.analyzed += 1
+            self._analyze_times.append(time.perf_counter())
+            return True
+        self.dropped += 1
+        return False
+
+    def record(self, latency, detected):
+        """
+        识别完成后回报耗时与结果，更新下一次的间隔
+        输入: latency 本次识别耗时(秒), detected 是否识别到车牌
+        """
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if detected:
+            self._last_active = self.frame_index
+
+        active = (self._last_active is not None
+                  and (self.frame_index - self._last_active) / self.source_fps <= self.active_hold)
+        if active:
+            interval = self._active_interval()
+        else:
+            interval = min(self.interval * 2, max(1.0, self.idle_interval * self.source_fps))
+        if self.realtime:
+            interval = max(interval, math.ceil(self.latency * self.source_fps))
+        self.interval = max(1, int(round(interval)))
+
+    @property
+    def analyzed_fps(self):
+        """ 最近一段时间实际识别的帧率 """
+        if len(self._analyze_times) < 2:
+            return 0.0
+        span = self._analyze_times[-1] - self._analyze_times[0]
+        return (len(self._analyze_times) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        return {
+            "frames": self.frame_index,
+            "analyzed": self.analyzed,
+            "dropped": self.dropped,
+            "interval": self.interval,
+            "latency_ms": (self.latency or 0.0) * 1000,
+            "analyzed_fps": self.analyzed_fps,
+        }
@@ -9,13 +9,15 @@ import cv2
 import os
 import socket
 
-from plate_utils import calculate_runtime
+from plate_utils import calculate_runtime, TimingHistory
 from plate_recognition import process_source
+from plate_tracker import PlateTracker, PlateDedupCache
 
 from gui_styles import GUIStyles
 from gui_handlers import GUIHandlers, DatabaseManager
 from gui_styles import GUIStyles
 from gui_handlers import GUIHandlers, DatabaseManager
+from gui_display import DisplaySurface, FramePresenter
 
 
 class LicensePlateRecognitionSystem(GUIStyles, GUIHandlers):
@@ -34,11 +36,28 @@ class LicensePlateRecognitionSystem(GUIStyles, GUIHandlers):
         self.selected_image_path = None
 
         # 摄像头相关变量
-        self.cap = None
+        self.capture = None  # 单一采集线程 (CaptureThread)，显示与识别分别订阅最新帧
+        self.display_slot = None
+        self.recognition_slot = None
+        self.display_fps = 30  # 显示订阅方的最高帧率
         self.is_camera_running = False
         self.is_camera_detecting = False
-        self.seen_plates = set()  # 记录已识别的车牌，避免重复提示
-        self.frame_queue = queue.Queue(maxsize=5)  # 用于处理识别的帧队列
+        self.plate_tracker = PlateTracker()  # 车牌轨迹跟踪，同一辆车只提示一次
+        self.plate_dedup = PlateDedupCache(window=60.0, max_size=1024)  # 60 秒内同一车道的同一车牌只提示一次
+        self.timing_history = TimingHistory(max_size=1000)  # 最近的识别分阶段耗时，可导出
+        self.last_stage_timing = None  # 当前显示结果所属识别的分阶段计时快照 (StageTimer.as_dict())
+        self.frame_ring = None  # 采集线程与识别进程之间的共享内存帧缓冲 (启用多进程识别时随识别服务创建)
+        self.frame_ring_slots = 5
+        self.frame_ring_shape = (1080, 1920, 3)  # 槽位容量，更大的帧不经过帧缓冲
+        self.camera_url = None  # 网络摄像头地址 (rtsp://... / http://...mjpg)，设置后替代 USB 摄像头
+        self.detect_width = None  # 摄像头检测宽度，高分辨率摄像头可设为 960 等以加快检测 (字符识别仍用原图)
+        self.camera_roi = None  # 车道感兴趣区域 (x1, y1, x2, y2) 相对坐标，None 表示整帧
+        self.lane_sources = []  # 多车道: [(车道ID, 摄像头索引或视频流地址, ROI), ...]，为空时只使用单个摄像头
+        self.lane_manager = None
+        self.motion_gate = None  # 运动门控，空闲车道跳过识别
+        self.frame_sampler = None  # 自适应抽帧调度 (识别线程启动时创建)
+        self.camera_recognition_thread = None
+        self.is_closing = False  # 窗口关闭中，后台清理完成后销毁窗口
 
         # 视频相关变量
         self.current_video_path = None  # 当前视频文件路径
@@ -46,6 +65,11 @@ class LicensePlateRecognitionSystem(GUIStyles, GUIHandlers):
         self.is_video_playing = False
         self.is_video_detecting = False
         self.video_thread = None
+        self.video_detect_thread = None  # 后台视频检测线程
+        self.video_detect_stop = None  # 置位后取消视频检测
+        self.video_preview_stop = None  # 置位后取消选择视频后的预览识别
+        self.video_preview_budget = 5.0  # 预览识别最多扫描的时长(秒)，超时未发现车牌即停止
+        self.video_detect_results = []  # [(timestamp, plate_number, confidence), ...]
 
         # 识别结果存储变量
         self.last_recognition_result = None  # 存储最后一次识别结果 (plate_number, plate_image)
@@ -56,6 +80,13 @@ class LicensePlateRecognitionSystem(GUIStyles, GUIHandlers):
         self.udp_server_port = 9001
         self.udp_socket = None
 
+        # 识别引擎配置 (常驻模型实例数，建议与并发识别线程数一致)
+        self.recognizer_instances = 2
+        # 识别进程数 (0 表示在本进程内识别，>0 时启动多进程识别服务)
+        self.recognition_workers = 0
+        self.recognition_service = None
+        self.service_lock = threading.Lock()  # 加载线程与退出清理都可能关闭识别服务
+
         # 界面控件变量 (初始化为None，在 create_widgets 中赋值)
         self.image_label = None
         self.video_preview_label = None
@@ -75,6 +106,19 @@ class LicensePlateRecognitionSystem(GUIStyles, GUIHandlers):
         # 初始化 UI 和 UDP 客户端
         self.setup_styles()
         self.create_widgets()
+
+        # 界面帧绘制调度：各显示区域只绘制最新帧，统一由一个定时器绘制；缩放和颜色转换在工作线程中完成
+        self.frame_presenter = FramePresenter(self.root, refresh_hz=60)
+        self.video_surface = DisplaySurface(self.video_label)  # 复用的显示图像，尺寸变化时才重新分配
+        self.preview_surface = DisplaySurface(self.video_preview_label)
+        self.frame_presenter.register("video", self._paint_video_label, widget=self.video_container)
+        self.frame_presenter.register("preview", self._paint_video_preview, widget=self.video_preview_label,
+                                      default_size=(500, 300))
+        self.frame_presenter.start()
+
         self.init_udp_client()
+        self.init_recognizer_engine()
+        # 关闭窗口时停止采集并关闭识别进程与共享帧缓冲，不依赖解释器退出时的清理
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.db_manager = DatabaseManager()
\ No newline at end of file
@@ -0,0 +1,139 @@
+import threading
+
+import cv2
+from PIL import Image, ImageTk
+
+
+class FramePresenter:
+    """
+    界面帧绘制调度
+    各工作线程 (摄像头、识别、视频播放) 只把帧交给 submit()，每个显示目标只保留最新的一帧待绘制，
+    旧的未绘制帧直接丢弃；Tk 线程上只有一个按刷新率运行的定时器统一绘制，
+    Tk 跟不上时事件队列里不会堆积过期帧。
+    注册时指定 widget 的目标从 <Configure> 事件跟踪显示尺寸，submit() 在调用线程中完成
+    缩放 (INTER_AREA) 和 BGR->RGB 转换，Tk 线程只负责贴图。
+    """
+
+    def __init__(self, root, refresh_hz=60):
+        self.root = root
+        self.interval_ms = max(1, int(round(1000.0 / refresh_hz)))
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._pending = {}
+        self._sizes = {}  # 目标 -> 显示尺寸 (w, h)
+        self._fits = {}  # 目标 -> ((帧宽, 帧高, 显示尺寸), 缩放后尺寸)
+        self._running = False
+
+    def register(self, name, paint, widget=None, default_size=(400, 300)):
+        """
+        注册显示目标，paint(frame) 在 Tk 线程中执行实际绘制
+        指定 widget 时 paint 收到的是已缩放到 widget 尺寸内的 RGB 帧
+        """
+        with self._lock:
+            self._targets[name] = {"paint": paint, "submitted": 0, "painted": 0, "dropped": 0}
+            self._sizes[name] = default_size if widget is not None else None
+            self._fits[name] = None
+        if widget is not None:
+            widget.bind("<Configure>", lambda event, n=name: self._on_configure(n, event), add="+")
+
+    def _on_configure(self, name, event):
+        if event.width > 1 and event.height > 1:
+            self._sizes[name] = (event.width, event.height)
+
+    def display_size(self, name):
+        """ 目标当前的显示尺寸 (w, h)，未跟踪尺寸时为 None """
+        return self._sizes.get(name)
+
+    def _prepare(self, name, frame):
+        """ 缩放到显示尺寸并转换为 RGB；缩放比例只在帧尺寸或显示尺寸变化时重新计算 """
+        size = self._sizes[name]
+        h, w = frame.shape[:2]
+        fit = self._fits[name]
+        if fit is None or fit[0] != (w, h, size):
+            scale = min(size[0] / w, size[1] / h, 1.0)
+            fit = ((w, h, size), (max(1, int(w * scale)), max(1, int(h * scale))))
+            self._fits[name] = fit
+        target_size = fit[1]
+        if target_size != (w, h):
+            frame = cv2.resize(frame, target_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def submit(self, name, frame):
+        """ 提交一帧 BGR 图像待绘制 (任意线程可调用)，上一帧尚未绘制时被替换并计为丢弃 """
+        if self._sizes.get(name) is not None:
+            frame = self._prepare(name, frame)
+        with self._lock:
+            target = self._targets[name]
+            target["submitted"] += 1
+            if self._pending.get(name) is not None:
+                target["dropped"] += 1
+            self._pending[name] = frame
+
+    def clear(self, name):
+        """ 丢弃该目标待绘制的帧 (停止播放/关闭摄像头时调用，避免清屏后又画上旧帧) """
+        with self._lock:
+            self._pending.pop(name, None)
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for name, frame in pending.items():
+            if frame is None:
+                continue
+            target = self._targets[name]
+            try:
+                target["paint"](frame)
+                target["painted"] += 1
+            except Exception as e:
+                print(f"[错误] 绘制 {name} 失败: {e}")
+        self.root.after(self.interval_ms, self._tick)
+
+    def stats(self):
+        """ 各目标的提交/绘制/丢弃帧数 """
+        with self._lock:
+            return {name: {k: v for k, v in target.items() if k != "paint"}
+                    for name, target in self._targets.items()}
+
+
+class DisplaySurface:
+    """
+    可复用的显示图像
+    每个标签持有一个 PhotoImage，尺寸不变时把新像素 paste 进同一个图像，
+    只有显示尺寸变化 (容器缩放) 时才重新分配，避免每帧在 Tk 线程上创建和释放大图。
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.size = None
+        self.frames = 0
+        self.allocations = 0
+
+    def show(self, image):
+        """ 显示一帧 RGB 图像 (np.ndarray 或 PIL.Image)，需在 Tk 线程中调用 """
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        if self.photo is None or image.size != self.size:
+            self.photo = ImageTk.PhotoImage(image=image)
+            self.size = image.size
+            self.allocations += 1
+        else:
+            self.photo.paste(image)
+        # 标签可能被清屏 (config(image="")) 过，需要重新挂上
+        if self.label.cget("image") != str(self.photo):
+            self.label.configure(image=self.photo, text="")
+            self.label.image = self.photo
+        self.frames += 1
+
+    def stats(self):
+        return {"frames": self.frames, "allocations": self.allocations, "size": self.size}
@@ -67,10 +67,19 @@ def speak_text(text):
         pass
 
 
+from plate_utils import StageTimer, format_timing
+
 # 确保在运行前创建 plate_utils.py 和 plate_recognition.py
 try:
     from plate_utils import calculate_runtime
-    from plate_recognition import process_source
+    from plate_recognition import process_source, iter_source, process_frame, init_engine, set_engine, crop_to_pil
+    from recognition_service import RecognitionService
+    from frame_ring import SharedFrameRing
+    from motion_gate import MotionGate
+    from frame_scheduler import AdaptiveSampler
+    from frame_capture import CaptureThread, open_video_capture
+    from stream_reader import open_capture
+    from lane_manager import Lane, LaneManager
 except ImportError:
     # 临时占位符，防止导入错误
     def calculate_runtime(func, *args, **kwargs):
@@ -78,7 +87,7 @@ except ImportError:
         return 0.1, None  # 模拟运行时长和返回值
 
 
-    def process_source(filename, save_path=None):
+    def process_source(filename, save_path=None, **kwargs):
         print("Warning: myIdentify.process_source not found. Using placeholder.")
         # 模拟返回一个识别结果和一张 PIL Image 对象
         if 'image' in filename:
@@ -90,6 +99,40 @@ except ImportError:
         return [(mock_plate, mock_image)]
 
 
+    def iter_source(source, **kwargs):
+        print("Warning: plate_recognition.iter_source not found. Using placeholder.")
+        return iter(())
+
+
+    def process_frame(frame, **kwargs):
+        print("Warning: plate_recognition.process_frame not found. Using placeholder.")
+        return [], None
+
+
+    def init_engine(num_instances=1, **kwargs):
+        print("Warning: plate_recognition.init_engine not found. Using placeholder.")
+        return None
+
+
+    def set_engine(engine):
+        return engine
+
+
+    def crop_to_pil(crop):
+        return crop
+
+
+    RecognitionService = None
+    SharedFrameRing = None
+    MotionGate = None
+    AdaptiveSampler = None
+    CaptureThread = None
+    open_video_capture = cv2.VideoCapture
+    open_capture = None
+    Lane = None
+    LaneManager = None
+
+
 # ----------------------------------------------
 # 数据库管理类
 # ----------------------------------------------
@@ -297,6 +340,89 @@ class GUIHandlers:
             self.system_status.set(f"🔴 系统错误 | UDP 初始化失败: {e}")
             messagebox.showerror("错误", f"UDP 客户端初始化失败: {e}")
 
+    def init_recognizer_engine(self):
+        """ 后台加载并预热识别引擎，避免首次识别时才加载模型 """
+
+        def _load():
+            self.root.after(0, lambda: self.system_status.set("🟡 识别模型加载中..."))
+            try:
+                if self.recognition_workers > 0 and RecognitionService is not None:
+                    # 多进程识别服务替换全局引擎，所有识别调用自动分发到子进程；
+                    # 摄像头帧经共享内存帧缓冲交给子进程，不跨进程复制整帧
+                    if SharedFrameRing is not None:
+                        self.frame_ring = SharedFrameRing.create(slots=self.frame_ring_slots,
+                                                                 max_shape=self.frame_ring_shape)
+                    self.recognition_service = RecognitionService(
+                        num_workers=self.recognition_workers,
+                        instances_per_worker=1,
+                        frame_ring=self.frame_ring
+                    )
+                    # 先登记为全局引擎再启动：启动期间的识别调用 (get_engine().load()) 等待同一个服务
+                    set_engine(self.recognition_service)
+                    self.recognition_service.start()
+                    if self.is_closing:
+                        # 加载期间窗口已关闭，on_close 的清理可能已经执行过
+                        self._close_recognition_service()
+                        return
+                    loaded_msg = f"{self.recognition_workers} 个识别进程"
+                else:
+                    init_engine(num_instances=self.recognizer_instances)
+                    loaded_msg = f"{self.recognizer_instances} 个实例"
+                self.root.after(0, lambda: self.system_status.set(
+                    f"🟢 系统运行正常 | 识别模型: 已加载 ({loaded_msg})"))
+            except Exception as e:
+                print(f"[错误] 识别引擎加载失败: {e}")
+                # except 结束后 e 会被解除绑定，消息须在此处生成
+                msg = f"🔴 识别模型加载失败: {e}"
+                self.root.after(0, lambda msg=msg: self.system_status.set(msg))
+                # 识别服务未能启动时帧缓冲无人使用，立即销毁共享内存；之后的识别回退到本进程的默认引擎
+                if self.recognition_service is not None:
+                    set_engine(None)
+                self._close_recognition_service()
+
+        threading.Thread(target=_load, daemon=True).start()
+
+    def _close_recognition_service(self):
+        """ 关闭识别子进程并销毁共享内存帧缓冲 (可重复调用) """
+        with self.service_lock:
+            service, self.recognition_service = self.recognition_service, None
+            ring, self.frame_ring = self.frame_ring, None
+        if service is not None:
+            service.close()
+        if ring is not None:
+            ring.close()
+
+    def on_close(self):
+        """ 关闭窗口：停止采集和后台任务，关闭识别进程与共享帧缓冲后销毁窗口 (清理在后台线程中进行) """
+        if self.is_closing:
+            return
+        self.is_closing = True
+        self.system_status.set("🟡 正在退出...")
+        self._cancel_video_jobs()
+        self.is_video_playing = False
+        self.is_camera_running = False
+        self.is_camera_detecting = False
+        lane_manager, capture = self.lane_manager, self.capture
+        self.lane_manager = None
+        self.capture = None
+        threading.Thread(target=self._shutdown, args=(lane_manager, capture), daemon=True).start()
+
+    def _shutdown(self, lane_manager, capture):
+        try:
+            self._stop_capture(lane_manager, capture)
+            # 识别线程可能仍持有帧缓冲槽位，等它退出后再销毁帧缓冲
+            if self.camera_recognition_thread is not None:
+                self.camera_recognition_thread.join(timeout=2.0)
+            self._close_recognition_service()
+            if self.udp_socket is not None:
+                self.udp_socket.close()
+                self.udp_socket = None
+        except Exception as e:
+            print(f"[错误] 退出清理失败: {e}")
+        finally:
+            self.frame_presenter.stop()
+            self.root.after(0, self.root.destroy)
+
     def send_plate_number_via_udp(self, plate_number):
         """ 发送车牌号信息到 UDP 服务器 """
         if self.udp_socket is None:
@@ -350,12 +476,15 @@ class GUIHandlers:
             filetypes=[("视频文件", "*.mp4 *.avi *.mov *.mkv"), ("所有文件", "*.*")]
         )
         if filename:
+            self._cancel_video_jobs()  # 停止上一个视频的预览和整段检测
             self.current_video_path = filename
             self.system_status.set(f"🟢 已选择视频文件: {os.path.basename(filename)}")
             self.show_video_viewer(filename)
 
-            # 视频文件选择后，立即进行一次识别预览
-            threading.Thread(target=self._process_file_recognition, args=(filename,), daemon=True).start()
+            # 视频文件选择后，识别到第一个车牌即停止，作为预览
+            self.video_preview_stop = threading.Event()
+            threading.Thread(target=self._preview_video_recognition, args=(filename, self.video_preview_stop),
+                             daemon=True).start()
 
             return filename
 
@@ -365,8 +494,15 @@ class GUIHandlers:
             self.root.after(0, lambda: self.process_time_var.set("识别中..."))
             self.root.after(0, lambda: self.plate_number_var.set("处理中..."))
 
-            cropped_results = process_source(filename)
-            _runtime, _ = calculate_runtime(process_source, filename)
+            # 只运行一次，计时在识别过程中分阶段记录
+            timer = StageTimer(os.path.basename(filename))
+            cropped_results = process_source(filename, timer=timer)
+            timer.stop()
+            record = timer.as_dict()
+            self.timing_history.append(record)
+            self.last_stage_timing = record
+            summary = format_timing(record)
+            print(f"[耗时] {os.path.basename(filename)}: {summary}")
 
             if cropped_results:
                 plate_number, plate_image = cropped_results[0]  # 只处理第一个识别结果
@@ -377,19 +513,83 @@ class GUIHandlers:
 
                 # 更新界面显示
                 self.root.after(0, lambda: self.plate_number_var.set(plate_number))
-                self.root.after(0, lambda: self.process_time_var.set(f"{_runtime:.2f}秒"))
+                self.root.after(0, lambda: self.process_time_var.set(summary))
                 self.root.after(0, lambda: self.plate_image_label.config(text="车牌已校正", bg='#d5edff'))
                 self.root.after(0, lambda: self.system_status.set(
                     f"🟢 识别完成 | 车牌: {plate_number} | 点击'开始识别'进行判断"))
 
                 # 更新校正车牌图像显示
                 self.root.after(0, lambda: self.update_plate_image_display(plate_image))
+            else:
+                self.root.after(0, lambda: self.plate_number_var.set("未识别到车牌"))
+                self.root.after(0, lambda: self.process_time_var.set(summary))
 
         except Exception as e:
             print(f"文件识别处理错误: {e}")
             self.root.after(0, lambda: self.plate_number_var.set("识别失败"))
             self.root.after(0, lambda: self.process_time_var.set("错误"))
 
+    def _cancel_video_jobs(self):
+        """ 取消后台的视频预览识别和整段检测 (在下一帧前结束) """
+        self.is_video_detecting = False
+        for stop_event in (self.video_preview_stop, self.video_detect_stop):
+            if stop_event is not None:
+                stop_event.set()
+
+    def _preview_video_recognition(self, filename, stop_event):
+        """
+        视频预览识别：扫描到第一个车牌即停止，不做整段识别
+        最多扫描 video_preview_budget 秒；stop_event 置位 (关闭/清除/选择其他视频/开始整段检测) 时提前结束
+        """
+        self.root.after(0, lambda: self.process_time_var.set("识别中..."))
+        self.root.after(0, lambda: self.plate_number_var.set("处理中..."))
+        timer = StageTimer(os.path.basename(filename))
+        deadline = time.monotonic() + self.video_preview_budget
+        timed_out = [False]
+
+        def _progress(frame_index, total_frames):
+            if time.monotonic() > deadline:
+                timed_out[0] = True
+                stop_event.set()
+
+        # 预览不保存标注图，不与整段检测争写同一个文件
+        events = iter_source(filename, save_path=None, scan_mode="grab", stop_event=stop_event, progress=_progress,
+                             timer=timer)
+        try:
+            event = next(events, None)
+        except Exception as e:
+            print(f"视频预览识别错误: {e}")
+            self.root.after(0, lambda: self.plate_number_var.set("识别失败"))
+            self.root.after(0, lambda: self.process_time_var.set("错误"))
+            return
+        finally:
+            events.close()
+
+        timer.stop()
+        record = timer.as_dict()
+        self.timing_history.append(record)
+        if filename != self.current_video_path or (event is None and stop_event.is_set() and not timed_out[0]):
+            return  # 已被取消 (切换视频、清除或开始整段检测)，不再显示预览结果
+        if event is None:
+            self.last_stage_timing = record
+            self.root.after(0, lambda: self.plate_number_var.set("未识别到车牌"))
+            self.root.after(0, lambda: self.process_time_var.set(format_timing(record)))
+            return
+        self._show_file_event(event.plate, event.crop, record)
+        self.root.after(0, lambda: self.system_status.set(
+            f"🟢 预览识别: {event.plate} | 点击'检测视频'识别整段视频"))
+
+    def _show_file_event(self, plate_number, plate_image, record):
+        """ 在界面上显示一个文件识别结果及其分阶段耗时快照 (可在工作线程中调用) """
+        self.last_recognition_result = (plate_number, plate_image)
+        self.recognition_source_type = "file"
+        self.last_stage_timing = record
+        summary = format_timing(record)
+        self.root.after(0, lambda: self.plate_number_var.set(plate_number))
+        self.root.after(0, lambda: self.process_time_var.set(summary))
+        self.root.after(0, lambda: self.plate_image_label.config(text="车牌已校正", bg='#d5edff'))
+        self.root.after(0, lambda: self.update_plate_image_display(plate_image))
+
     def start_recognition(self):
         """ 开始识别（进行数据库比对和UDP发送）"""
         # 检查是否有识别结果
@@ -399,19 +599,23 @@ class GUIHandlers:
 
         plate_number, plate_image = self.last_recognition_result
         source_type = self.recognition_source_type or "unknown"
+        # 每次判断单独计时 (数据库比对、UDP 发送)，不修改识别阶段已保存的计时快照
+        timer = StageTimer(f"{plate_number} 判断")
+        recognition = self.last_stage_timing if source_type == "file" else None
 
         try:
-            # 检查车牌是否在授权列表中
-            is_authorized = self.db_manager.check_plate_exists(plate_number)
-
-            # 记录识别记录到数据库
-            action_taken = "allow" if is_authorized else "deny"
-            self.db_manager.add_recognition_record(
-                plate_number,
-                source_type=source_type,
-                is_authorized=is_authorized,
-                action_taken=action_taken
-            )
+            with timer.stage("db"):
+                # 检查车牌是否在授权列表中
+                is_authorized = self.db_manager.check_plate_exists(plate_number)
+
+                # 记录识别记录到数据库
+                action_taken = "allow" if is_authorized else "deny"
+                self.db_manager.add_recognition_record(
+                    plate_number,
+                    source_type=source_type,
+                    is_authorized=is_authorized,
+                    action_taken=action_taken
+                )
 
             # 更新状态显示
             status_msg = "授权通过" if is_authorized else "未授权"
@@ -424,7 +628,13 @@ class GUIHandlers:
                 pass
 
             # 发送UDP消息到服务器
-            self.send_plate_number_via_udp(plate_number)
+            with timer.stage("udp"):
+                self.send_plate_number_via_udp(plate_number)
+            timer.stop()
+            record = timer.as_dict()
+            self.timing_history.append(record)
+            summary = format_timing(record)
+            self.process_time_var.set(f"{format_timing(recognition)} + 判断 {summary}" if recognition else summary)
 
             # 显示结果消息
             messagebox.showinfo("识别结果", f"车牌号码: {plate_number}\n授权状态: {status_msg}\n")
@@ -439,27 +649,45 @@ class GUIHandlers:
             messagebox.showinfo("提示", "摄像头已经在运行")
             return
 
-        try:
-            # 打开摄像头
-            if sys.platform.startswith("win"):
-                self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-            else:
-                self.cap = cv2.VideoCapture(0)
+        if self.lane_sources and LaneManager is not None:
+            self.open_lanes_with_recognition()
+            return
 
-            # 尝试 1 号摄像头
-            if not self.cap.isOpened():
-                self.cap = cv2.VideoCapture(1)
+        try:
+            if CaptureThread is None:
+                messagebox.showerror("错误", "采集模块 frame_capture 不可用")
+                return
 
-            if self.cap.isOpened():
+            if self.camera_url:
+                # 网络摄像头：首次连接与断流重连都由采集线程在后台按退避重试
+                capture = open_capture(self.camera_url)
+            else:
+                # 打开摄像头，失败时尝试 1 号摄像头
+                capture = CaptureThread(0)
+                if not capture.open():
+                    capture = CaptureThread(1)
+                    capture.open()
+
+            if capture.auto_reconnect or capture.isOpened():
+                # 单一采集线程读帧，显示与识别各自订阅最新帧
+                self.capture = capture
+                if self.frame_ring is not None and self.recognition_service is not None:
+                    capture.attach_ring(self.frame_ring)  # 采集线程直接写入共享帧缓冲
+                self.display_slot = capture.subscribe("display", max_fps=self.display_fps)
+                self.recognition_slot = capture.subscribe("recognition")
+                capture.start()
                 self.is_camera_running = True
                 self.is_camera_detecting = True
-                self.seen_plates.clear()  # 清空已识别车牌记录
+                self.plate_tracker.reset()  # 清空车牌轨迹
+                if MotionGate is not None:
+                    self.motion_gate = MotionGate(roi=self.camera_roi)
 
                 self.video_label.config(text="摄像头启动中...", fg='#f1c40f')
-                self.system_status.set("🟢 系统运行正常 | 摄像头: 已连接 | 车牌识别: 进行中")
+                camera_state = "已连接" if capture.isOpened() else "连接中"
+                self.system_status.set(f"🟢 系统运行正常 | 摄像头: {camera_state} | 车牌识别: 进行中")
 
-                # 启动摄像头显示线程 (UI线程调用)
-                self.root.after(100, self.update_camera_display)
+                # 启动摄像头显示线程
+                self.start_camera_display()
 
                 # 启动识别处理线程
                 self.start_recognition_processing()
@@ -471,6 +699,46 @@ class GUIHandlers:
         except Exception as e:
             messagebox.showerror("错误", f"摄像头错误: {str(e)}")
 
+    def open_lanes_with_recognition(self):
+        """ 多车道模式：每个车道独立采集、门控和去重，共享识别引擎；实时视频区显示第一个车道 """
+        try:
+            lanes = [Lane(lane_id, source, roi, detect_width=self.detect_width)
+                     for lane_id, source, roi in self.lane_sources]
+            self.lane_manager = LaneManager(lanes, on_plate=self._on_lane_plate, dedup=self.plate_dedup).start()
+        except Exception as e:
+            self.lane_manager = None
+            messagebox.showerror("错误", f"车道启动失败: {str(e)}")
+            return
+
+        self.is_camera_running = True
+        self.is_camera_detecting = True
+        self.display_slot = self.lane_manager.lanes[0].capture.subscribe("display", max_fps=self.display_fps)
+        self.video_label.config(text="摄像头启动中...", fg='#f1c40f')
+        self.start_camera_display()
+        self.root.after(1000, self.update_lane_status)
+        messagebox.showinfo("提示", f"已启动 {len(self.lane_manager.lanes)} 个车道的实时识别")
+
+    def _on_lane_plate(self, lane_id, plate_number, plate_image, annotated):
+        """ 车道识别线程回调：记录结果并更新界面 """
+        self.last_recognition_result = (plate_number, plate_image)
+        self.recognition_source_type = "camera"
+        self.root.after(0, lambda: self.plate_number_var.set(plate_number))
+        self.root.after(0, lambda: self.system_status.set(
+            f"🟢 车道 {lane_id} 识别到车牌: {plate_number} | 点击'开始识别'进行判断"))
+        self.save_detected_plate(plate_number, plate_image)
+        if annotated is not None and self.lane_manager is not None \
+                and self.lane_manager.lanes[0].lane_id == lane_id:
+            self.update_detection_display(annotated)
+
+    def update_lane_status(self):
+        """ 定期在状态栏显示各车道的识别帧率与耗时 """
+        if self.lane_manager is None or not self.is_camera_running:
+            return
+        parts = [f"车道{s['lane']} {s['analyzed_fps']:.1f}FPS/{s['latency_ms']:.0f}ms"
+                 for s in self.lane_manager.stats()]
+        self.process_time_var.set(" | ".join(parts))
+        self.root.after(1000, self.update_lane_status)
+
     def start_recognition_processing(self):
         """ 启动识别处理线程 """
         if not self.is_camera_detecting:
@@ -483,64 +751,109 @@ class GUIHandlers:
         self.camera_recognition_thread.start()
 
     def camera_recognition_worker(self):
-        """ 摄像头识别工作线程 - 使用myIdentify的process_source函数 """
-        frame_count = 0
-        temp_frame_path = "temp_camera_frame.jpg"
-        temp_result_path = "temp_result.jpg"
+        """ 摄像头识别工作线程 - 帧在内存中识别和标注，不经过临时文件 """
+        capture = self.capture
+        slot_in = self.recognition_slot
+        if capture is None or slot_in is None:
+            return
+        camera_fps = capture.get(cv2.CAP_PROP_FPS)
+        sampler = AdaptiveSampler(source_fps=camera_fps or 30.0, realtime=True) if AdaptiveSampler else None
+        self.frame_sampler = sampler
+        service = self.recognition_service
+        used_ring = None
+        last_seq = 0
 
         while self.is_camera_running and self.is_camera_detecting:
-            if self.cap is None:
-                time.sleep(0.1)
-                continue
-
-            ret, frame = self.cap.read()
-            if not ret:
-                time.sleep(0.1)
-                continue
-
-            frame_count += 1
-
-            # 每5帧处理一次，提高性能
-            if frame_count % 5 != 0:
+            # 从采集线程取最新帧；识别期间错过的帧由采集端计为该订阅方的丢帧
+            item = slot_in.get(timeout=0.5)
+            if item is None:
                 continue
+            frame_count, timestamp, frame = item
+
+            # 多进程识别时改用采集线程写入共享帧缓冲的最新帧，子进程在槽位上原地检测
+            ring = capture.ring if service is not None else None
+            slot = None
+            if ring is not None:
+                acquired = ring.acquire(latest=True, after_seq=last_seq)
+                if acquired is None:
+                    continue
+                slot, last_seq = acquired
+                frame = ring.view(slot)
+                used_ring = ring
 
             try:
-                # 保存临时帧用于识别
-                cv2.imwrite(temp_frame_path, frame)
+                # 由自适应调度决定是否识别该帧 (无调度器时退回每5帧一次)
+                if sampler is not None:
+                    if not sampler.should_analyze(frame_count):
+                        continue
+                elif frame_count % 5 != 0:
+                    continue
+
+                # 车道内没有运动时跳过识别
+                if self.motion_gate is not None and not self.motion_gate.check(frame, now=timestamp):
+                    continue
 
-                # 使用myIdentify的process_source函数处理帧
                 start_time = time.time()
-                cropped_results = process_source(temp_frame_path, save_path=temp_result_path)
+                detections = None
+                if slot is not None:
+                    # 槽位由本线程持有到标注和裁剪完成后才释放
+                    detections = service.submit_slot(slot, last_seq, detect=True, detect_width=self.detect_width,
+                                                     release=False).result()
+                # 跟踪器把连续帧关联成轨迹，只返回新出现车辆的车牌 (裁剪图与标注图均为独立副本)
+                cropped_results, result_frame = process_frame(frame, tracker=self.plate_tracker,
+                                                              display_size=self.frame_presenter.display_size("video"),
+                                                              detect_width=self.detect_width,
+                                                              detections=detections)
                 processing_time = time.time() - start_time
+                if sampler is not None:
+                    sampler.record(processing_time,
+                                   bool(cropped_results) or bool(self.plate_tracker.active_results()))
 
                 # 处理识别结果
                 if cropped_results:
                     for plate_number, plate_image in cropped_results:
-                        if plate_number and plate_number not in self.seen_plates:
-                            self.seen_plates.add(plate_number)
+                        if not plate_number:
+                            continue
+                        # 时间窗内重复出现的车牌 (轨迹断开后再次识别) 不再提示
+                        if not self.plate_dedup.check(plate_number, lane="camera"):
+                            continue
 
-                            # 存储识别结果，等待"开始识别"按钮点击
-                            self.last_recognition_result = (plate_number, plate_image)
-                            self.recognition_source_type = "camera"
+                        # 存储识别结果，等待"开始识别"按钮点击
+                        self.last_recognition_result = (plate_number, plate_image)
+                        self.recognition_source_type = "camera"
 
-                            # 在GUI线程中更新结果（只显示识别结果，不进行判断）
-                            self.root.after(0, lambda pn=plate_number, pt=processing_time:
-                            self.update_recognition_result(pn, pt))
+                        # 在GUI线程中更新结果（只显示识别结果，不进行判断）
+                        self.root.after(0, lambda pn=plate_number, pt=processing_time:
+                        self.update_recognition_result(pn, pt))
 
-                            # 保存车牌图像
-                            self.save_detected_plate(plate_number, plate_image)
+                        # 保存车牌图像
+                        self.save_detected_plate(plate_number, plate_image)
 
                 # 如果有识别结果，显示带识别框的图像
-                if os.path.exists(temp_result_path):
-                    result_frame = cv2.imread(temp_result_path)
-                    if result_frame is not None:
-                        # 确保显示在 video_label (实时视频流区域)
-                        self.root.after(0, lambda f=result_frame: self.update_detection_display(f))
+                if result_frame is not None:
+                    # 确保显示在 video_label (实时视频流区域)
+                    self.update_detection_display(result_frame)
 
             except Exception as e:
                 print(f"识别处理错误: {e}")
+            finally:
+                if slot is not None:
+                    frame = None
+                    ring.release(slot)
+
+            if sampler is None:
+                time.sleep(0.1)  # 控制识别频率
 
-            time.sleep(0.1)  # 控制识别频率
+        if self.motion_gate is not None:
+            print(f"[信息] 运动门控统计: {self.motion_gate.stats()}")
+        if sampler is not None:
+            print(f"[信息] 抽帧调度统计: {sampler.stats()}")
+        print(f"[信息] 车牌跟踪统计: {self.plate_tracker.stats()}")
+        print(f"[信息] 车牌去重统计: {self.plate_dedup.stats()}")
+        print(f"[信息] 采集统计: {capture.stats()}")
+
+        if used_ring is not None:
+            print(f"[信息] 帧缓冲统计: {used_ring.stats()}")
 
     def save_manual_input(self):
         """ 保存手动录入的车牌信息到数据库 """
@@ -614,19 +927,17 @@ class GUIHandlers:
         self.is_camera_detecting = False
         self.is_video_detecting = False
 
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
-
-        # 清理临时文件
-        temp_files = ["temp_camera_frame.jpg", "temp_result.jpg"]
-        for temp_file in temp_files:
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-
+        # 停止采集要等阻塞中的 read() 超时返回 (网络流最长数秒)，放到后台线程，界面不卡顿
+        lane_manager, capture = self.lane_manager, self.capture
+        self.lane_manager = None
+        self.capture = None
+        self.display_slot = None
+        self.recognition_slot = None
+        if lane_manager is not None or capture is not None:
+            threading.Thread(target=self._stop_capture, args=(lane_manager, capture), daemon=True).start()
+
+        self.frame_presenter.clear("video")
+        print(f"[信息] 界面绘制统计: {self.frame_presenter.stats()}, 显示缓冲: {self.video_surface.stats()}")
         self.video_label.config(image="",
                                 text="🎥 视频流显示区域\n\n点击'打开相机识别'开始实时识别",
                                 fg='#ecf0f1')
@@ -636,26 +947,91 @@ class GUIHandlers:
         self.plate_number_var.set("")
         self.process_time_var.set("0.0秒")
 
+    def _stop_capture(self, lane_manager, capture):
+        """ 停止车道识别/采集线程并释放设备 (后台线程) """
+        if lane_manager is not None:
+            lane_manager.stop()
+        if capture is not None:
+            capture.stop()
+            stats = capture.stats()
+            print(f"[信息] 摄像头采集 {stats['capture_fps']:.1f} FPS, 各订阅方: {stats['subscribers']}")
+
     def detect_video(self):
         """ 检测视频 """
         if not self.is_camera_running and not self.current_video_path:
             messagebox.showwarning("警告", "请先打开摄像头或选择视频文件")
             return
 
-        self.is_video_detecting = True
-        self.system_status.set("🟡 系统运行正常 | 视频检测: 进行中")
-
         if self.current_video_path:
-            messagebox.showinfo("提示", f"开始检测视频文件: {os.path.basename(self.current_video_path)}")
-            # 实际的视频检测逻辑应在这里启动，可能是另一个线程
-            # 暂时只做状态切换
-
+            if self.video_detect_thread is not None and self.video_detect_thread.is_alive():
+                messagebox.showinfo("提示", "视频检测正在进行中")
+                return
+            if self.video_preview_stop is not None:
+                self.video_preview_stop.set()  # 整段检测会覆盖预览结果，不再同时解码同一文件
+            self.is_video_detecting = True
+            self.video_detect_stop = threading.Event()
+            self.video_detect_results = []
+            self.system_status.set("🟡 系统运行正常 | 视频检测: 进行中")
+            self.video_detect_thread = threading.Thread(
+                target=self._video_detection_worker,
+                args=(self.current_video_path, self.video_detect_stop),
+                daemon=True
+            )
+            self.video_detect_thread.start()
         else:
+            self.is_video_detecting = True
+            self.system_status.set("🟡 系统运行正常 | 视频检测: 进行中")
             messagebox.showinfo("提示", "开始实时视频检测")
 
+    def _video_detection_worker(self, filename, stop_event):
+        """ 后台整段检测视频：逐个显示识别结果，并定期刷新进度 (帧/秒、百分比、剩余时间) """
+        name = os.path.basename(filename)
+        start_time = time.time()
+        timer = StageTimer(name)
+        last_update = [0.0]
+
+        def _progress(frame_index, total_frames):
+            now = time.time()
+            if now - last_update[0] < 0.5:
+                return
+            last_update[0] = now
+            elapsed = max(now - start_time, 1e-6)
+            speed = frame_index / elapsed
+            if total_frames:
+                percent = min(100.0, frame_index * 100.0 / total_frames)
+                eta = max(0.0, (total_frames - frame_index) / speed) if speed else 0.0
+                text = (f"🟡 视频检测: {name} | {percent:.0f}% | {speed:.0f} 帧/秒 | "
+                        f"剩余 {time.strftime('%M:%S', time.gmtime(eta))} | 车牌 {len(self.video_detect_results)} 个")
+            else:
+                text = f"🟡 视频检测: {name} | {speed:.0f} 帧/秒 | 车牌 {len(self.video_detect_results)} 个"
+            self.root.after(0, lambda: self.system_status.set(text))
+
+        try:
+            for event in iter_source(filename, scan_mode="grab", stop_event=stop_event, progress=_progress,
+                                     timer=timer):
+                self.video_detect_results.append((event.timestamp, event.plate, event.confidence))
+                print(f"[视频检测] {event.timestamp:.1f}秒 {event.plate} ({event.confidence:.2f})")
+                # 显示到目前为止的计时快照，之后的检测不会改动已显示的记录
+                self._show_file_event(event.plate, event.crop, timer.as_dict())
+        except Exception as e:
+            print(f"视频检测错误: {e}")
+            msg = f"🔴 视频检测失败: {e}"
+            self.root.after(0, lambda msg=msg: self.system_status.set(msg))
+            return
+        finally:
+            self.is_video_detecting = False
+            timer.stop()
+            self.timing_history.append(timer)
+
+        runtime = time.time() - start_time
+        state = "已停止" if stop_event.is_set() else "完成"
+        count = len(self.video_detect_results)
+        self.root.after(0, lambda: self.system_status.set(
+            f"🟢 视频检测{state} | 共识别 {count} 个车牌 | 用时 {runtime:.1f}秒"))
+
     def close_video(self):
         """ 关闭视频 """
-        self.is_video_detecting = False
+        self._cancel_video_jobs()  # 取消后台预览识别和视频检测
         self.stop_video_playback()  # 同时停止播放
         if self.is_camera_running:
             self.system_status.set("🟢 系统运行正常 | 摄像头: 已连接 | 视频检测: 已停止")
@@ -693,15 +1069,36 @@ class GUIHandlers:
         self.plate_image_label.config(image="", text="🚗 校正后的车牌图像", bg='white')
         self.plate_number_var.set("")
         self.process_time_var.set("0.0秒")
+        self.last_stage_timing = None
         self.current_video_path = None
         self.video_preview_label.config(image="", text="🎥 车辆视频将显示在这里\n\n请点击'选取视频'按钮加载视频文件",
                                         bg='#2c3e50', fg='#ecf0f1')
         self.video_info_label.config(text="未选择视频文件", fg='#7f8c8d')
         self.video_label.config(image="", text="🎥 视频流显示区域\n\n点击'打开相机识别'开始实时识别", fg='#ecf0f1')
-        self.seen_plates.clear()  # 清空已识别车牌记录
+        self.plate_tracker.reset()  # 清空车牌轨迹
+        self.plate_dedup.reset()  # 清空去重缓存
+        self._cancel_video_jobs()  # 取消后台预览识别和视频检测
         self.stop_video_playback()  # 停止视频播放
         self.close_camera()  # 关闭相机/识别
 
+    def export_timing_history(self):
+        """ 导出识别耗时记录 (每次识别的分阶段耗时) 为 CSV 或 JSON """
+        if not len(self.timing_history):
+            messagebox.showinfo("提示", "暂无识别耗时记录")
+            return
+        filename = filedialog.asksaveasfilename(
+            title="导出耗时记录",
+            defaultextension=".csv",
+            filetypes=[("CSV 文件", "*.csv"), ("JSON 文件", "*.json")]
+        )
+        if not filename:
+            return
+        try:
+            count = self.timing_history.export(filename)
+            self.system_status.set(f"🟢 已导出 {count} 条耗时记录: {os.path.basename(filename)}")
+        except Exception as e:
+            messagebox.showerror("错误", f"导出耗时记录失败: {str(e)}")
+
     def resize_image_to_fit(self, image, max_width, max_height):
         """ 调整图像大小以适应显示区域 """
         h, w = image.shape[:2]
@@ -717,51 +1114,30 @@ class GUIHandlers:
         new_w = int(w * scale)
         new_h = int(h * scale)
 
-        # 调整图像大小
-        resized = cv2.resize(image, (new_w, new_h))
+        # 调整图像大小 (缩小时使用区域插值)
+        resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
         return resized
 
     def update_camera_display(self):
-        """ 更新摄像头显示（原始帧）"""
-        if not self.is_camera_running or self.cap is None:
-            return
-
-        ret, frame = self.cap.read()
-        if ret:
-            # 转换为RGB格式
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        """ 更新摄像头显示（原始帧）：在后台线程中等待采集线程发布的最新帧，缩放转换后交给绘制调度 """
+        slot = self.display_slot
+        while self.is_camera_running and slot is not None and slot is self.display_slot:
+            item = slot.get(timeout=0.5)
+            if item is not None:
+                self.frame_presenter.submit("video", item[2])
 
-            # 调整图像大小以适应显示区域
-            frame_rgb = self.resize_image_to_fit(frame_rgb,
-                                                 self.video_container.winfo_width(),
-                                                 self.video_container.winfo_height())
-
-            # 转换为PIL图像然后转换为Tkinter图像
-            img = Image.fromarray(frame_rgb)
-            imgtk = ImageTk.PhotoImage(image=img)
-
-            self.video_label.configure(image=imgtk, text="")
-            self.video_label.image = imgtk
-
-        # 继续更新显示
-        if self.is_camera_running:
-            self.root.after(30, self.update_camera_display)
+    def start_camera_display(self):
+        """ 启动摄像头显示线程 """
+        threading.Thread(target=self.update_camera_display, daemon=True).start()
 
     def update_detection_display(self, frame):
-        """ 更新检测结果显示（带识别框的帧）"""
-        try:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_resized = self.resize_image_to_fit(frame_rgb,
-                                                     self.video_container.winfo_width(),
-                                                     self.video_container.winfo_height())
+        """ 更新检测结果显示（带识别框的帧），可在识别线程中直接调用 """
+        self.frame_presenter.submit("video", frame)
 
-            img = Image.fromarray(frame_resized)
-            imgtk = ImageTk.PhotoImage(image=img)
-
-            self.video_label.configure(image=imgtk, text="")
-            self.video_label.image = imgtk
-        except Exception as e:
-            print(f"更新检测显示错误: {e}")
+    def _paint_video_label(self, frame_rgb):
+        """ 在实时视频区贴图 (由 FramePresenter 在 Tk 线程中调用，帧已缩放并转换为 RGB) """
+        # 复用同一个 PhotoImage，尺寸不变时只拷贝像素
+        self.video_surface.show(frame_rgb)
 
     def update_recognition_result(self, plate_number, processing_time):
         """ 更新识别结果到界面 """
@@ -788,6 +1164,9 @@ class GUIHandlers:
     def update_plate_image_display(self, plate_image):
         """ 更新校正车牌图像显示 """
         try:
+            # 识别结果是 numpy 裁剪图，只在显示时转换为 PIL 图像
+            plate_image = crop_to_pil(plate_image)
+
             # 调整图像大小
             plate_image.thumbnail((200, 100))
             imgtk = ImageTk.PhotoImage(plate_image)
@@ -824,6 +1203,7 @@ class GUIHandlers:
         if self.video_cap:
             self.video_cap.release()
             self.video_cap = None
+        self.frame_presenter.clear("preview")
 
         self.root.after(0, lambda: self.video_preview_label.config(
             image="",
@@ -837,7 +1217,7 @@ class GUIHandlers:
     def _video_playback_worker(self):
         """ 视频播放工作线程 """
         try:
-            self.video_cap = cv2.VideoCapture(self.current_video_path)
+            self.video_cap = open_video_capture(self.current_video_path)
             cap = self.video_cap
             if not cap.isOpened():
                 self.root.after(0, lambda: messagebox.showerror("错误", "无法打开视频文件"))
@@ -864,8 +1244,8 @@ class GUIHandlers:
                     cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
                     continue
 
-                # 在UI线程中更新显示
-                self.root.after(0, lambda f=frame: self._update_video_frame(f))
+                # 交给绘制调度，Tk 跟不上时只绘制最新帧
+                self._update_video_frame(frame)
                 time.sleep(delay / 1000.0)
 
             cap.release()
@@ -874,38 +1254,12 @@ class GUIHandlers:
             self.root.after(0, lambda: messagebox.showerror("错误", f"视频播放错误: {str(e)}"))
 
     def _update_video_frame(self, frame):
-        """ 更新视频帧显示 (左侧视频预览区域)"""
-        try:
-            # 获取显示区域的实际大小
-            self.video_preview_label.update_idletasks()
-            label_width = self.video_preview_label.winfo_width()
-            label_height = self.video_preview_label.winfo_height()
+        """ 更新视频帧显示 (左侧视频预览区域)，可在播放线程中直接调用 """
+        self.frame_presenter.submit("preview", frame)
 
-            # 如果标签大小未知，使用默认大小
-            if label_width <= 1 or label_height <= 1:
-                label_width, label_height = 500, 300
-
-            # 调整帧大小以适应显示区域
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w = frame_rgb.shape[:2]
-
-            # 计算缩放比例，保持宽高比
-            scale = min(label_width / w, label_height / h, 1.0)
-            new_w = int(w * scale)
-            new_h = int(h * scale)
-
-            if new_w > 0 and new_h > 0:
-                frame_resized = cv2.resize(frame_rgb, (new_w, new_h))
-
-                # 转换为PIL图像然后转换为Tkinter图像
-                img = Image.fromarray(frame_resized)
-                imgtk = ImageTk.PhotoImage(image=img)
-
-                self.video_preview_label.configure(image=imgtk)
-                self.video_preview_label.image = imgtk
-
-        except Exception as e:
-            print(f"更新视频帧时出错: {e}")
+    def _paint_video_preview(self, frame_rgb):
+        """ 在视频预览区贴图 (由 FramePresenter 在 Tk 线程中调用，帧已缩放并转换为 RGB) """
+        self.preview_surface.show(frame_rgb)
 
     def show_video_viewer(self, filename):
         """ 显示视频文件的缩略图预览 """
@@ -916,7 +1270,7 @@ class GUIHandlers:
                 return
 
             # 打开视频文件
-            cap = cv2.VideoCapture(filename)
+            cap = open_video_capture(filename)
             if not cap.isOpened():
                 messagebox.showerror("错误", "无法打开视频文件")
                 return
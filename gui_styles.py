@@ -432,6 +432,11 @@ class GUIStyles:
                  bg='#f8f9fa',
                  fg='#495057').pack(side='left')
 
+        ttk.Button(process_time_frame, text="导出",
+                   command=self.export_timing_history,
+                   style='Secondary.TButton',
+                   width=5).pack(side='left', padx=6)
+
         time_label = tk.Label(process_time_frame,
                               textvariable=self.process_time_var,
                               font=('微软雅黑', 10, 'bold'),
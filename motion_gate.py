@@ -0,0 +1,108 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    运动/ROI 门控
+    在缩小后的感兴趣区域上做背景差分，车道内有运动时才放行帧去做完整的车牌识别，
+    空闲车道每帧只需要一次小图差分。
+    - roi: (x1, y1, x2, y2) 相对坐标 (0~1)，None 表示整帧
+    - hold_time: 运动停止后继续放行的秒数，保证车辆减速停下时仍能被识别
+    - max_open / cooldown: 连续放行超过 max_open 秒后暂停 cooldown 秒，
+      并把当前画面并入背景，避免停在车道里的车辆反复触发
+    """
+
+    def __init__(self, roi=None, process_width=160, diff_threshold=25, min_area_ratio=0.01,
+                 bg_alpha=0.05, hold_time=1.0, max_open=10.0, cooldown=5.0):
+        self.roi = roi
+        self.process_width = process_width
+        self.diff_threshold = diff_threshold
+        self.min_area_ratio = min_area_ratio
+        self.bg_alpha = bg_alpha
+        self.hold_time = hold_time
+        self.max_open = max_open
+        self.cooldown = cooldown
+        self.reset()
+
+    def reset(self):
+        """ 清空背景模型和统计 """
+        self._background = None
+        self._open_since = None
+        self._last_motion = None
+        self._cooldown_until = 0.0
+        self.checked = 0
+        self.passed = 0
+        self.last_motion_ratio = 0.0
+
+    def _prepare(self, frame):
+        """ 截取 ROI、缩小并转灰度 """
+        h, w = frame.shape[:2]
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            frame = frame[int(y1 * h):int(y2 * h), int(x1 * w):int(x2 * w)]
+            h, w = frame.shape[:2]
+        if w > self.process_width:
+            scale = self.process_width / w
+            frame = cv2.resize(frame, (self.process_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def check(self, frame, now=None):
+        """
+        判断该帧是否需要识别
+        输入: now 帧时间(秒)，hold_time/cooldown 按它计时；视频文件应传入片内时间，
+              放行结果才与处理速度无关。默认 time.monotonic()，同一个门控中不要混用不同时钟
+        输出: True 放行, False 跳过
+        """
+        now = time.monotonic() if now is None else now
+        self.checked += 1
+        gray = self._prepare(frame)
+
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            self.passed += 1
+            return True  # 首帧无背景可比，放行一次
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        self.last_motion_ratio = float(np.count_nonzero(diff > self.diff_threshold)) / diff.size
+        cv2.accumulateWeighted(gray, self._background, self.bg_alpha)
+
+        if now < self._cooldown_until:
+            return False
+
+        if self.last_motion_ratio >= self.min_area_ratio:
+            self._last_motion = now
+        active = self._last_motion is not None and now - self._last_motion <= self.hold_time
+
+        if not active:
+            self._open_since = None
+            return False
+
+        if self._open_since is None:
+            self._open_since = now
+        elif now - self._open_since > self.max_open:
+            # 持续放行过久：认为是静止目标，直接并入背景并进入冷却
+            self._background = gray.astype(np.float32)
+            self._open_since = None
+            self._last_motion = None
+            self._cooldown_until = now + self.cooldown
+            return False
+
+        self.passed += 1
+        return True
+
+    @property
+    def hit_rate(self):
+        """ 放行比例，用于调节阈值 """
+        return self.passed / self.checked if self.checked else 0.0
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "passed": self.passed,
+            "hit_rate": self.hit_rate,
+            "motion_ratio": self.last_motion_ratio,
+        }
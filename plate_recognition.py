@@ -2,164 +2,818 @@ import cv2
 import hyperlpr3 as lpr3
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+import itertools
 import os
+import queue
 import sys
+import threading
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager, nullcontext
+
+from plate_utils import iter_batches, is_stream_url
+from plate_tracker import PlateTracker
+from frame_capture import open_video_capture
+from stream_reader import open_network_capture
+
+IMAGE_EXTS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+# 检测模型输出的一个车牌: box (x1, y1, x2, y2), score, landmarks 4x2 角点, layer 单/双层
+Detection = namedtuple("Detection", ["box", "score", "landmarks", "layer"])
+DOUBLE_LAYER = 1
+# 识别结果 (code, conf, type_idx, box) 中车牌类型未知时的取值：分检测/识别两步的路径不运行 hyperlpr3 的类型分类
+PLATE_TYPE_UNKNOWN = -1
+
+# 流式处理产出的识别事件
+PlateEvent = namedtuple("PlateEvent", ["timestamp", "frame_index", "plate", "confidence", "box", "crop"])
+
+
+def _parse_detection(out):
+    return Detection(
+        box=out[:4].astype(int).tolist(),
+        score=float(out[4]),
+        landmarks=out[5:13].reshape(4, 2).astype(int),
+        layer=int(out[13]),
+    )
+
+
+def _warp_plate(frame, landmarks):
+    """ 按四个角点透视校正出车牌区域 (与 hyperlpr3 流水线一致) """
+    points = np.asarray(landmarks, dtype=np.float32)
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    matrix = cv2.getPerspectiveTransform(points, target)
+    pad = cv2.warpPerspective(frame, matrix, (width, height),
+                              borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+    if height > 0 and width > 0 and height * 1.0 / width >= 1.5:
+        pad = np.rot90(pad)
+    return pad
+
+
+def _read_pad(recognizer, pad, layer):
+    """ 对校正后的车牌图像做字符识别，双层车牌上下分开识别 """
+    if pad.size == 0:
+        return '', 0.0
+    if layer == DOUBLE_LAYER:
+        line = int(pad.shape[0] * 0.4)
+        top_code, top_conf = recognizer(pad[:line])
+        bottom_code, bottom_conf = recognizer(pad[line:])
+        code, conf = top_code + bottom_code, (top_conf + bottom_conf) / 2
+    else:
+        code, conf = recognizer(pad)
+    # 与 hyperlpr3 流水线相同，不足 7 位视为无效
+    if len(code) < 7:
+        return '', float(conf)
+    return code, float(conf)
+
+
+# -------------------------------
+# 识别引擎
+# -------------------------------
+class RecognizerEngine:
+    """
+    常驻的车牌识别引擎
+    启动时一次性加载 num_instances 个 LicensePlateCatcher 并预热，
+    之后各线程通过 instance() 借用空闲实例，每帧只付出推理开销。
+    hyperlpr3 的检测器在实例上保存中间状态，同一实例同一时刻只能被一个线程使用。
+    """
+
+    def __init__(self, num_instances=1, detect_level=lpr3.DETECT_LEVEL_LOW, warmup=True):
+        self.num_instances = max(1, int(num_instances))
+        self.detect_level = detect_level
+        self.warmup_on_load = warmup
+        self._idle = queue.Queue()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._batch_executor = None
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def load(self):
+        """ 加载全部模型实例（重复调用无副作用） """
+        with self._load_lock:
+            if self._loaded:
+                return self
+            start_time = time.perf_counter()
+            for _ in range(self.num_instances):
+                self._idle.put(lpr3.LicensePlateCatcher(detect_level=self.detect_level))
+            self._loaded = True
+            print(f"[信息] 识别引擎加载完成: {self.num_instances} 个实例, "
+                  f"耗时 {time.perf_counter() - start_time:.2f}秒")
+        if self.warmup_on_load:
+            self.warmup()
+        return self
+
+    def warmup(self, size=(640, 480)):
+        """ 用空白帧让每个实例各跑一次推理，完成 ONNX 会话的首次初始化 """
+        dummy = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        start_time = time.perf_counter()
+        held = []
+        try:
+            for _ in range(self.num_instances):
+                lpr = self._idle.get()
+                held.append(lpr)
+                lpr(dummy)
+        finally:
+            for lpr in held:
+                self._idle.put(lpr)
+        print(f"[信息] 识别引擎预热完成, 耗时 {time.perf_counter() - start_time:.2f}秒")
+
+    @contextmanager
+    def instance(self, timeout=None):
+        """ 借用一个空闲实例，用完自动归还 """
+        if not self._loaded:
+            self.load()
+        try:
+            lpr = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("识别引擎繁忙，等待空闲实例超时")
+        try:
+            yield lpr
+        finally:
+            self._idle.put(lpr)
+
+    def recognize(self, frame, timeout=None):
+        """
+        对单帧执行推理
+        输出: hyperlpr3 原始结果 [(code, conf, type_idx, box), ...]
+        """
+        with self.instance(timeout=timeout) as lpr:
+            return lpr(frame)
+
+    def detect(self, frame, timeout=None):
+        """
+        仅运行检测模型 (不做字符识别)
+        输出: [Detection, ...]
+        """
+        with self.instance(timeout=timeout) as lpr:
+            return [_parse_detection(out) for out in lpr.pipeline.detector(frame)]
+
+    def read_plate(self, frame, detection, timeout=None):
+        """
+        仅对一个检测到的车牌区域做字符识别
+        输出: (plate_number, confidence)，无效时 plate_number 为空串
+        """
+        pad = _warp_plate(frame, detection.landmarks)
+        with self.instance(timeout=timeout) as lpr:
+            return _read_pad(lpr.pipeline.recognizer, pad, detection.layer)
+
+    def recognize_batch(self, frames):
+        """
+        对一批帧执行推理，结果与输入顺序一一对应
+        批次按实例数切分，每段只借用一次实例并在独立线程中连续推理
+        （onnxruntime 推理时释放 GIL，多个实例可以并行）
+        输出: [[(code, conf, type_idx, box), ...], ...]
+        """
+        return self._run_batch(frames, lambda lpr, frame: lpr(frame))
+
+    def detect_batch(self, frames):
+        """ 批量检测，输出与 frames 顺序一致的 [[Detection, ...], ...] """
+        return self._run_batch(
+            frames, lambda lpr, frame: [_parse_detection(out) for out in lpr.pipeline.detector(frame)])
+
+    def _run_batch(self, frames, infer):
+        frames = list(frames)
+        if not frames:
+            return []
+        if not self._loaded:
+            self.load()
+
+        def _run_chunk(chunk):
+            with self.instance() as lpr:
+                return [infer(lpr, frame) for frame in chunk]
+
+        workers = min(self.num_instances, len(frames))
+        if workers == 1:
+            return _run_chunk(frames)
+
+        # 交错切分，使各段耗时接近
+        chunks = [frames[i::workers] for i in range(workers)]
+        if self._batch_executor is None:
+            with self._load_lock:
+                if self._batch_executor is None:
+                    self._batch_executor = ThreadPoolExecutor(
+                        max_workers=self.num_instances, thread_name_prefix="lpr-batch")
+        chunk_results = list(self._batch_executor.map(_run_chunk, chunks))
+
+        results = [None] * len(frames)
+        for offset, chunk_result in enumerate(chunk_results):
+            results[offset::workers] = chunk_result
+        return results
+
+    def close(self):
+        """ 释放批量推理线程 """
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=False)
+            self._batch_executor = None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def init_engine(num_instances=1, detect_level=lpr3.DETECT_LEVEL_LOW, warmup=True):
+    """
+    创建并加载全局识别引擎（程序启动时调用一次）
+    输入: num_instances 实例个数, 一般取同时识别的线程数
+    输出: RecognizerEngine
+    先登记为全局引擎再加载：加载期间其他线程的 get_engine() 等待同一个引擎的加载锁，不会另建默认引擎
+    """
+    global _engine
+    engine = RecognizerEngine(num_instances, detect_level=detect_level, warmup=warmup)
+    with _engine_lock:
+        _engine = engine
+    return engine.load()
+
+
+def set_engine(engine):
+    """
+    替换全局识别引擎
+    输入: 任何实现 load/recognize/recognize_batch 的对象 (如 RecognitionService)
+    """
+    global _engine
+    with _engine_lock:
+        _engine = engine
+    return engine
+
+
+def get_engine():
+    """ 获取全局识别引擎，未初始化时按默认配置创建 """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RecognizerEngine()
+        engine = _engine
+    return engine.load()
+
 
 # -------------------------------
 # 识别函数
 # -------------------------------
-def recognize_frame(frame):
+def _format_results(results, with_confidence):
+    if with_confidence:
+        return [(code, float(conf), box) for code, conf, type_idx, box in results]
+    return [(code, box) for code, conf, type_idx, box in results]
+
+
+def _read_detections(frame, detections, engine):
+    """
+    对检测结果逐个在原图上校正并识别字符，输出与 hyperlpr3 相同格式的结果
+    不做车牌类型分类，type_idx 固定为 PLATE_TYPE_UNKNOWN (det.layer 是单/双层，不是类型)
+    """
+    results = []
+    for det in detections:
+        code, conf = engine.read_plate(frame, det)
+        if code:
+            results.append((code, conf, PLATE_TYPE_UNKNOWN, det.box))
+    return results
+
+
+def recognize_frame(frame, engine=None, with_confidence=False, detect_width=None):
     """
     识别传入的 OpenCV 矩阵中的车牌
-    输入: frame (np.ndarray)
-    输出: [(plate_number, box), ...]
+    输入: frame (np.ndarray), engine 识别引擎(默认使用全局引擎), with_confidence 是否返回置信度,
+          detect_width 指定时在缩小到该宽度的图上检测、在原图裁剪上识别字符 (高分辨率画面更快)
+    输出: [(plate_number, box), ...] 或 [(plate_number, confidence, box), ...]
     """
-    lpr = lpr3.LicensePlateCatcher()
-    results = lpr(frame)
-    return [(code, box) for code, conf, type_idx, box in results]
+    engine = engine or get_engine()
+    if detect_width and frame.shape[1] > detect_width:
+        # 分辨率金字塔：在缩小图上检测，在原图上按角点校正并识别字符
+        results = _read_detections(frame, detect_frames([frame], engine, detect_width)[0], engine)
+    else:
+        results = engine.recognize(frame)
+    return _format_results(results, with_confidence)
+
+
+def recognize_batch(frames, engine=None, with_confidence=False, detect_width=None):
+    """
+    批量识别多帧（摄像头连拍、视频抽帧、图片目录）
+    输入: frames List[np.ndarray], engine 识别引擎(默认使用全局引擎), with_confidence 是否返回置信度,
+          detect_width 同 recognize_frame
+    输出: 与 frames 顺序一致的 [[(plate_number, box), ...], ...]
+    """
+    engine = engine or get_engine()
+    if detect_width:
+        frames = list(frames)
+        batch_detections = detect_frames(frames, engine, detect_width)
+        batch_results = [_read_detections(frame, detections, engine)
+                         for frame, detections in zip(frames, batch_detections)]
+    else:
+        batch_results = engine.recognize_batch(frames)
+    return [_format_results(results, with_confidence) for results in batch_results]
+
+
+def scale_detections(detections, factor):
+    """ 把缩小图上的检测结果按 factor 映射回原图坐标 """
+    if factor == 1.0:
+        return detections
+    return [det._replace(box=[int(round(v * factor)) for v in det.box],
+                         landmarks=np.round(det.landmarks * factor).astype(int))
+            for det in detections]
+
+
+def detect_frames(frames, engine=None, detect_width=None):
+    """
+    批量检测，可选在缩小的图像上运行检测模型
+    输入: detect_width 检测时的最大宽度 (None 表示原图)，框和角点会映射回原图，
+          字符识别仍在原图上裁剪，不损失车牌分辨率
+    输出: 与 frames 顺序一致的 [[Detection, ...], ...]
+    """
+    engine = engine or get_engine()
+    inputs, factors = [], []
+    for frame in frames:
+        w = frame.shape[1]
+        if detect_width and w > detect_width:
+            h = frame.shape[0]
+            scale = detect_width / w
+            frame = cv2.resize(frame, (detect_width, max(1, int(round(h * scale)))), interpolation=cv2.INTER_AREA)
+            factors.append(w / detect_width)
+        else:
+            factors.append(1.0)
+        inputs.append(frame)
+    if len(inputs) == 1:
+        batch_detections = [engine.detect(inputs[0])]
+    else:
+        batch_detections = engine.detect_batch(inputs)
+    return [scale_detections(dets, factor) for dets, factor in zip(batch_detections, factors)]
+
+
+def track_frame(frame, tracker, engine=None, detections=None, with_confidence=False):
+    """
+    检测并跟踪一帧，只对车牌尚未投票稳定的轨迹裁剪车牌做字符识别
+    输入: frame (np.ndarray), tracker PlateTracker, detections 已有的检测结果(可选),
+          with_confidence 是否返回置信度 (投票胜出读数的平均 OCR 置信度，与图片模式含义一致)
+    输出: 本帧新确认车牌的 [(plate_number, box), ...] 或 [(plate_number, confidence, box), ...]
+    """
+    engine = engine or get_engine()
+    if detections is None:
+        detections = engine.detect(frame)
+    confirmed = []
+    for track in tracker.update(detections):
+        if not tracker.needs_ocr(track):
+            continue
+        code, conf = engine.read_plate(frame, track.detection)
+        if tracker.submit_reading(track, code, conf):
+            # 上报投票胜出的车牌，而不是本帧的单次读数
+            if with_confidence:
+                confirmed.append((track.plate, track.confidence, track.box))
+            else:
+                confirmed.append((track.plate, track.box))
+    return confirmed
 
 
 # -------------------------------
 # 绘制函数
 # -------------------------------
-def draw_frame(frame, results):
-    """
-    在矩阵上绘制车牌框和车牌号
-    输入: frame (np.ndarray), results [(plate_number, box), ...]
-    输出: 绘制后的矩阵 (np.ndarray)
-    """
-    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    pil_img = Image.fromarray(img_rgb)
-    draw = ImageDraw.Draw(pil_img)
+FONT_SIZE = 22
+BOX_COLOR = (0, 255, 0)  # lime (BGR)
 
-    # ---- 字体路径自动选择（兼容 Win + Linux） ----
-    font = None
-    font_paths = []
 
+def _font_candidates():
+    """ 字体路径自动选择（兼容 Win + Linux） """
     if sys.platform.startswith("win"):
-        font_paths = [
+        return [
             r"C:\Windows\Fonts\simhei.ttf",
             r"C:\Windows\Fonts\simsun.ttc",
             r"C:\Windows\Fonts\msyh.ttc",
             r"C:\Windows\Fonts\arial.ttf",
         ]
-    else:
-        font_paths = [
-            "/usr/share/fonts/truetype/arphic/ukai.ttc",
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-        ]
+    return [
+        "/usr/share/fonts/truetype/arphic/ukai.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    ]
 
-    for fp in font_paths:
+
+def load_font(size=FONT_SIZE):
+    """ 按候选路径加载 TrueType 字体，全部失败时使用默认字体 """
+    for fp in _font_candidates():
         if os.path.exists(fp):
             try:
-                font = ImageFont.truetype(fp, 22)
+                font = ImageFont.truetype(fp, size)
                 print(f"[信息] 成功加载字体: {fp}")
-                break
+                return font
             except Exception as e:
                 print(f"[警告] 字体加载失败 {fp}: {e}")
 
-    if font is None:
-        font = ImageFont.load_default()
-        print("[警告] 使用默认字体 (不支持中文)")
+    print("[警告] 使用默认字体 (不支持中文)")
+    return ImageFont.load_default()
 
-    # ---- 绘制检测框 ----
-    for code, box in results:
-        x1, y1, x2, y2 = map(int, box)
-        draw.rectangle([x1, y1, x2, y2], outline="lime", width=3)
-        draw.text((x1, max(y1 - 25, 0)), code, fill="lime", font=font)
 
-    return cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
+class PlateRenderer:
+    """
+    车牌标注绘制器
+    字体只加载一次，每个字符 (含省份汉字) 渲染成灰度字形后缓存，
+    之后直接用 OpenCV 在 BGR 矩阵上画框、用 numpy 按字形混合文字，
+    不再每帧做 BGR->RGB->PIL->BGR 的整帧转换。
+    """
+
+    def __init__(self, font_size=FONT_SIZE, color=BOX_COLOR, thickness=3):
+        self.font_size = font_size
+        self.color = np.array(color, dtype=np.float32)
+        self.color_tuple = tuple(int(c) for c in color)
+        self.thickness = thickness
+        self._font = None
+        self._glyphs = {}
+        self._lock = threading.Lock()
+
+    @property
+    def font(self):
+        if self._font is None:
+            with self._lock:
+                if self._font is None:
+                    self._font = load_font(self.font_size)
+        return self._font
+
+    def glyph(self, char):
+        """
+        获取字符字形
+        输出: (alpha 矩阵 float32 0~1, 基线以上偏移, 前进宽度)
+        """
+        cached = self._glyphs.get(char)
+        if cached is not None:
+            return cached
+        font = self.font
+        left, top, right, bottom = font.getbbox(char)
+        advance = int(round(font.getlength(char))) if hasattr(font, "getlength") else right
+        width, height = max(1, right - left), max(1, bottom - top)
+        mask = Image.new("L", (width, height), 0)
+        ImageDraw.Draw(mask).text((-left, -top), char, fill=255, font=font)
+        cached = (np.asarray(mask, dtype=np.float32) / 255.0, left, top, max(advance, width))
+        self._glyphs[char] = cached
+        return cached
+
+    def put_text(self, img, text, origin):
+        """ 在 img 上原地绘制文字，origin 为文字左上角 (与 PIL ImageDraw.text 一致) """
+        x, y = origin
+        img_h, img_w = img.shape[:2]
+        for char in text:
+            alpha, left, top, advance = self.glyph(char)
+            gx, gy = x + left, y + top
+            gh, gw = alpha.shape
+            # 裁掉超出画面的部分
+            x1, y1 = max(gx, 0), max(gy, 0)
+            x2, y2 = min(gx + gw, img_w), min(gy + gh, img_h)
+            if x1 < x2 and y1 < y2:
+                a = alpha[y1 - gy:y2 - gy, x1 - gx:x2 - gx, None]
+                roi = img[y1:y2, x1:x2]
+                roi[:] = (roi * (1.0 - a) + self.color * a).astype(np.uint8)
+            x += advance
+
+    def draw(self, frame, results, display_size=None, copy=True):
+        """
+        绘制车牌框和车牌号
+        输入:
+            frame: BGR 矩阵, results: [(plate_number, box), ...]
+            display_size: (w, h) 指定时先缩小到显示尺寸再绘制，只在小图上作画；
+                          与 FramePresenter 一致不放大 (比例上限 1.0)，原始帧与标注帧显示尺寸相同
+            copy: False 时直接在 frame 上绘制 (无需缩小时有效)
+        输出: 绘制后的 BGR 矩阵
+        """
+        scale = 1.0
+        if display_size is not None:
+            h, w = frame.shape[:2]
+            scale = min(display_size[0] / w, display_size[1] / h, 1.0)
+        if scale < 1.0:
+            h, w = frame.shape[:2]
+            img = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                             interpolation=cv2.INTER_AREA)
+        else:
+            img = frame.copy() if copy else frame
+
+        for code, box in results:
+            x1, y1, x2, y2 = (int(v * scale) for v in box)
+            cv2.rectangle(img, (x1, y1), (x2, y2), self.color_tuple, self.thickness)
+            self.put_text(img, code, (x1, max(y1 - 25, 0)))
+        return img
+
+
+_renderer = PlateRenderer()
+
+
+def get_renderer():
+    """ 获取共享的绘制器 (字体与字形缓存全局复用) """
+    return _renderer
+
+
+def draw_frame(frame, results):
+    """
+    在矩阵上绘制车牌框和车牌号
+    输入: frame (np.ndarray), results [(plate_number, box), ...]
+    输出: 绘制后的矩阵 (np.ndarray)
+    """
+    return _renderer.draw(frame, results)
 
 
 # -------------------------------
 # 裁剪车牌函数
 # -------------------------------
-def crop_plates(frame, results):
+def crop_plates(frame, results, copy=False):
     """
     裁剪出车牌区域
-    输出: List[(plate_number, PIL.Image)]
+    返回按画面边界裁剪后的 numpy 视图 (BGR, 不复制像素)，需要显示时再用 crop_to_pil 转换
+    输入: copy True 时返回独立的小图副本，不再引用整帧 (需要长期保存裁剪图时使用)
+    输出: List[(plate_number, np.ndarray)]；框完全在画面外或坐标颠倒 (裁剪后为空) 的车牌被跳过
     """
-    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    pil_img = Image.fromarray(img_rgb)
+    h, w = frame.shape[:2]
     cropped_list = []
     for code, box in results:
         x1, y1, x2, y2 = map(int, box)
-        cropped = pil_img.crop((x1, y1, x2, y2))
-        cropped_list.append((code, cropped))
+        x1, x2 = min(max(x1, 0), w), min(max(x2, 0), w)
+        y1, y2 = min(max(y1, 0), h), min(max(y2, 0), h)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        cropped = frame[y1:y2, x1:x2]
+        cropped_list.append((code, cropped.copy() if copy else cropped))
     return cropped_list
 
 
+def crop_to_pil(crop):
+    """ 将 BGR 裁剪图转换为 PIL.Image (仅在界面实际显示时调用) """
+    if isinstance(crop, Image.Image):
+        return crop
+    return Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+
+
 # -------------------------------
-# 通用处理函数
+# 单帧内存处理函数
 # -------------------------------
-def process_source(source, save_path="res.png", frame_skip=5):
+def process_frame(frame, engine=None, tracker=None, display_size=None, detect_width=None, detections=None):
     """
-    处理图片/视频/摄像头
+    在内存中识别单帧并绘制标注 (不读写任何文件)
     输入:
-        source: str(图像/视频路径) 或 int(摄像头索引)
-        save_path: str 输出路径
-    输出: List[(plate_number, PIL.Image裁剪图)]
+        frame: BGR 矩阵 (可以是共享帧缓冲中的视图，本函数返回的数据均不引用它)
+        tracker: PlateTracker 指定时把 frame 视为连续帧，只返回新确认的车牌
+        display_size: (w, h) 指定时直接输出显示尺寸的标注图
+        detect_width: 检测模型输入的最大宽度 (分辨率金字塔)，None 表示原图检测
+        detections: 已有的检测结果 (如识别进程在共享帧缓冲上检测所得)，指定后不再检测
+    输出: (List[(plate_number, np.ndarray 裁剪图)], 标注图 np.ndarray 或 None)
+          没有可绘制的车牌时标注图为 None
     """
+    if tracker is not None:
+        if detections is None and detect_width:
+            detections = detect_frames([frame], engine, detect_width)[0]
+        results = track_frame(frame, tracker, engine, detections)
+        drawn = tracker.active_results()
+    else:
+        # 按置信度从高到低排序，调用方取第一个即为最可信的结果
+        if detections is not None:
+            scored = _format_results(_read_detections(frame, detections, engine or get_engine()), True)
+        else:
+            scored = recognize_frame(frame, engine, with_confidence=True, detect_width=detect_width)
+        scored.sort(key=lambda item: item[1], reverse=True)
+        results = drawn = [(code, box) for code, conf, box in scored]
+
+    annotated = _renderer.draw(frame, drawn, display_size=display_size) if drawn else None
+    return crop_plates(frame, results, copy=True), annotated
+
+
+# -------------------------------
+# 通用处理函数
+# -------------------------------
+def _stage(timer, name):
+    """ 计入 StageTimer 的 name 阶段，timer 为 None 时不计时 """
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def _read_images(paths):
+    """ 依次读取图片，跳过无法读取的文件 """
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            print("[错误] 无法读取图片:", path)
+            continue
+        yield path, img
+
+
+def _sample_frames(cap, frame_skip, sampler=None, scan_mode="decode"):
+    """
+    从视频流中每 frame_skip 帧取一帧，指定 sampler 时由其决定取哪些帧
+    scan_mode:
+        "decode" 逐帧完整解码 (原有行为)
+        "grab"   跳过的帧只 grab() 不解码，只有被选中的帧才 retrieve()
+        "seek"   直接定位到下一个采样帧 (只适用于视频文件且不使用 sampler；间隔较大时最快)
+    """
+    if scan_mode == "seek" and sampler is None:
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_count = frame_skip
+        while total <= 0 or frame_count <= total:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count - 1)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_count, frame
+            frame_count += frame_skip
+        print("[提示] 视频结束")
+        return
+
+    fast = scan_mode in ("grab", "seek")
+    frame_count = 0
+    while True:
+        frame_count += 1
+        if sampler is not None:
+            wanted = sampler.should_analyze()
+        else:
+            wanted = frame_count % frame_skip == 0
+
+        if not wanted:
+            ok = cap.grab() if fast else cap.read()[0]
+            if not ok:
+                print("[提示] 视频结束")
+                break
+            continue
+
+        ret, frame = cap.read()
+        if not ret:
+            print("[提示] 视频结束")
+            break
+        yield frame_count, frame
+
+
+def _frame_timestamp(cap, frame_index, live):
+    """ 摄像头取当前时间，视频文件取帧在片中的秒数 """
+    if live:
+        return time.time()
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    return (frame_index - 1) / fps
+
+
+def iter_source(source, save_path="res.png", frame_skip=5, engine=None, batch_size=1, max_wait=0.5,
+                motion_gate=None, sampler=None, tracker=None, scan_mode="decode", sample_interval=None,
+                detect_width=None, stop_event=None, progress=None, dedup=None, timer=None):
+    """
+    流式处理图片/图片目录/视频/摄像头，识别到车牌即产出事件
+    参数与 process_source 相同，另有:
+        stop_event: threading.Event，置位后在下一帧前结束 (其他线程取消用)；
+                    在同一线程中也可直接 close() 本生成器，资源同样会被释放
+        progress: 视频/摄像头模式下每识别完一批调用 progress(frame_index, total_frames)，
+                  total_frames 未知 (摄像头) 时为 0
+        dedup: PlateDedupCache，指定后同一来源的同一车牌在其时间窗内只产出一次；
+               视频文件按片内时间计 (应使用单独的缓存)，摄像头/网络流与图片使用缓存自身的时钟
+        timer: plate_utils.StageTimer，指定后把解码、检测识别、绘制、裁剪各阶段耗时累计到其中
+    输出: 逐个产出 PlateEvent(timestamp, frame_index, plate, confidence, box, crop)
+          timestamp 视频为片内秒数、摄像头为 time.time()、图片为 None；
+          frame_index 视频为帧号、目录为图片序号；crop 为独立的 BGR 小图副本。
+          不累积任何结果，内存占用与运行时长无关
+    """
+    live = isinstance(source, int) or is_stream_url(source)
+
+    def _events(frame, scored, timestamp, frame_index):
+        for code, conf, box in scored:
+            with _stage(timer, "crop"):
+                crops = crop_plates(frame, [(code, box)], copy=True)
+            if not crops:
+                continue  # 框在画面外，没有可用的车牌图像
+            # 视频文件按片内时间计算去重时间窗，与处理速度无关；实时源不传 now，与其他调用方共用缓存时钟
+            if dedup is not None and not dedup.check(code, lane=source, now=None if live else timestamp):
+                continue
+            yield PlateEvent(timestamp, frame_index, code, float(conf), box, crops[0][1])
+
+    # -------- 图片目录模式 --------
+    if isinstance(source, str) and os.path.isdir(source):
+        paths = sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTS
+        )
+        images = _read_images(paths)
+        if timer is not None:
+            images = timer.timed(images, "decode")
+        images = enumerate(images, 1)
+        if stop_event is not None:
+            images = itertools.takewhile(lambda _item: not stop_event.is_set(), images)
+        with closing(iter_batches(images, batch_size, max_wait)) as batches:
+            for batch in batches:
+                with _stage(timer, "detect"):
+                    batch_results = recognize_batch([img for _, (_, img) in batch], engine, with_confidence=True,
+                                                    detect_width=detect_width)
+                for (index, (path, img)), scored in zip(batch, batch_results):
+                    if not scored:
+                        continue
+                    if save_path is not None:
+                        with _stage(timer, "draw"):
+                            cv2.imwrite(save_path, draw_frame(img, [(code, box) for code, conf, box in scored]))
+                    yield from _events(img, scored, None, index)
+        return
 
     # -------- 图片模式 --------
     if isinstance(source, str) and os.path.isfile(source):
         ext = os.path.splitext(source)[1].lower()
-        if ext in ['.jpg', '.jpeg', '.png', '.bmp']:
-            img = cv2.imread(source)
+        if ext in IMAGE_EXTS:
+            with _stage(timer, "decode"):
+                img = cv2.imread(source)
             if img is None:
                 print("[错误] 无法读取图片:", source)
-                return []
-            results = recognize_frame(img)
-            if not results:
-                return []
-            out_img = draw_frame(img, results)
-            cv2.imwrite(save_path, out_img)
-            cropped = crop_plates(img, results)
-
-            return cropped
+                return
+            with _stage(timer, "detect"):
+                if tracker is not None:
+                    detections = detect_frames([img], engine, detect_width)[0] if detect_width else None
+                    scored = track_frame(img, tracker, engine, detections, with_confidence=True)
+                    drawn = tracker.active_results()
+                else:
+                    # 按置信度从高到低排序，调用方取第一个即为最可信的结果
+                    scored = recognize_frame(img, engine, with_confidence=True, detect_width=detect_width)
+                    scored.sort(key=lambda item: item[1], reverse=True)
+                    drawn = [(code, box) for code, conf, box in scored]
+            if not scored:
+                return
+            if save_path is not None:
+                with _stage(timer, "draw"):
+                    cv2.imwrite(save_path, draw_frame(img, drawn))
+            yield from _events(img, scored, None, 1)
+            return
 
     # -------- 摄像头 / 视频模式 --------
 
-    if isinstance(source, int):
-        if sys.platform.startswith("win"):
-            cap = cv2.VideoCapture(source, cv2.CAP_DSHOW)
-        else:
-            cap = cv2.VideoCapture(source)
+    if is_stream_url(source):
+        cap = open_network_capture(source)
     else:
-        cap = cv2.VideoCapture(source)
+        cap = open_video_capture(source)
 
     if not cap.isOpened():
         print("[错误] 无法打开视频/摄像头:", source)
-        return []
+        return
 
+    if tracker is None:
+        tracker = PlateTracker()
+    engine = engine or get_engine()
+    total_frames = 0 if live else max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
 
-    seen_plates = set()
-    frame_count = 0
-    cropped_results = []
+    try:
+        if sample_interval:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            frame_skip = max(1, int(round(sample_interval * fps)))
+        if live and scan_mode == "seek":
+            scan_mode = "grab"  # 摄像头/网络流无法定位
+        decoded = _sample_frames(cap, frame_skip, sampler, scan_mode)
+        if timer is not None:
+            decoded = timer.timed(decoded, "decode")
+        sampled = ((index, _frame_timestamp(cap, index, live), frame) for index, frame in decoded)
+        if stop_event is not None:
+            sampled = itertools.takewhile(lambda _item: not stop_event.is_set(), sampled)
+        if motion_gate is not None:
+            # 以帧时间 (视频为片内秒数) 计时，放行哪些帧与处理速度无关
+            sampled = (item for item in sampled if motion_gate.check(item[2], now=item[1]))
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[提示] 视频结束")
-            break
+        # 提前结束时先停止凑批的后台读取线程，再释放视频
+        with closing(iter_batches(sampled, batch_size, max_wait)) as batches:
+            for batch in batches:
+                frames = [frame for _, _, frame in batch]
+                start_time = time.perf_counter()
+                with _stage(timer, "detect"):
+                    batch_detections = detect_frames(frames, engine, detect_width)
 
-        frame_count += 1
-        if frame_count % frame_skip != 0:
-            continue
+                    # 轨迹关联必须按帧顺序进行，只有新轨迹才做字符识别
+                    batch_results = [track_frame(frame, tracker, engine, detections, with_confidence=True)
+                                     for frame, detections in zip(frames, batch_detections)]
+                if sampler is not None:
+                    sampler.record((time.perf_counter() - start_time) / len(frames), any(batch_detections))
+                if progress is not None:
+                    progress(batch[-1][0], total_frames)
 
-        results = recognize_frame(frame)
-        if results:
-            new_results = [(c, b) for c, b in results if c not in seen_plates]
-            for code, _ in new_results:
-                seen_plates.add(code)
-                print(f"[识别到新车牌] {code}")
-
-            if new_results:
-                out_img = draw_frame(frame, new_results)
-                cv2.imwrite(save_path, out_img)
-                cropped_results.extend(crop_plates(frame, new_results))
-
-    cap.release()
-    cv2.destroyAllWindows()
-    return cropped_results
+                for (index, timestamp, frame), scored in zip(batch, batch_results):
+                    if not scored:
+                        continue
+                    for code, conf, box in scored:
+                        print(f"[识别到新车牌] {code}")
+                    if save_path is not None:
+                        with _stage(timer, "draw"):
+                            cv2.imwrite(save_path, draw_frame(frame, [(code, box) for code, conf, box in scored]))
+                    yield from _events(frame, scored, timestamp, index)
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        if motion_gate is not None:
+            print(f"[信息] 运动门控统计: {motion_gate.stats()}")
+        if sampler is not None:
+            print(f"[信息] 抽帧调度统计: {sampler.stats()}")
+        print(f"[信息] 车牌跟踪统计: {tracker.stats()}")
+
+
+def process_source(source, save_path="res.png", frame_skip=5, engine=None, batch_size=1, max_wait=0.5,
+                   motion_gate=None, sampler=None, tracker=None, scan_mode="decode", sample_interval=None,
+                   detect_width=None, timer=None):
+    """
+    处理图片/图片目录/视频/摄像头 (iter_source 的列表形式，处理结束后一次返回)
+    输入:
+        source: str(图像/目录/视频路径或 rtsp:// / http:// 网络流地址) 或 int(摄像头索引)
+        save_path: str 标注图输出路径，None 表示不绘制也不保存 (批处理时使用)
+        engine: RecognizerEngine 识别引擎(默认使用全局引擎)
+        batch_size: 目录/视频模式下每批识别的帧数 (1 表示逐帧识别)
+        max_wait: 凑批的最长等待时间(秒)，超时后不足一批也立即识别
+        motion_gate: MotionGate 视频/摄像头模式下只识别有运动的帧 (None 表示不过滤)
+        sampler: AdaptiveSampler 自适应抽帧调度，指定后取代 frame_skip
+        tracker: PlateTracker 车牌跟踪器；图片模式下指定后把图片视为连续帧，只返回新车辆，
+                 视频/摄像头模式下默认新建一个，每辆车只上报一次
+        scan_mode: 视频抽帧方式 "decode" / "grab" (跳过的帧不解码) / "seek" (按帧号定位，仅视频文件)
+        sample_interval: 按秒指定采样间隔，换算成帧数后取代 frame_skip
+        detect_width: 检测模型输入的最大宽度 (所有模式)，框映射回原图后在原图裁剪上识别字符；
+                      None 表示使用原图检测
+        timer: plate_utils.StageTimer，指定后记录各阶段耗时 (只计时本次实际运行)
+    输出: List[(plate_number, np.ndarray 裁剪图 BGR)]，显示时用 crop_to_pil 转换
+    """
+    events = iter_source(source, save_path, frame_skip, engine, batch_size, max_wait, motion_gate, sampler,
+                         tracker, scan_mode, sample_interval, detect_width, timer=timer)
+    return [(event.plate, event.crop) for event in events]
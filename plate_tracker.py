@@ -0,0 +1,299 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+
+def box_iou(a, b):
+    """ 计算两个 (x1, y1, x2, y2) 框的交并比 """
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def _center_distance(a, b):
+    """ 中心点距离，以两框平均宽度归一化 """
+    ax, ay = (a[0] + a[2]) / 2, (a[1] + a[3]) / 2
+    bx, by = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+    width = max(1.0, ((a[2] - a[0]) + (b[2] - b[0])) / 2)
+    return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5 / width
+
+
+class PlateConsensus:
+    """
+    多帧车牌文字投票
+    每次识别按置信度加权，对车牌长度和每一位字符分别投票；
+    至少 min_readings 次识别且每一位的得票占比都不低于 threshold 时认为结果稳定，可提前停止识别。
+    """
+
+    def __init__(self, threshold=0.75, min_readings=2):
+        self.threshold = threshold
+        self.min_readings = min_readings
+        self.readings = 0
+        self.total_weight = 0.0
+        self.length_votes = defaultdict(float)
+        self.char_votes = []
+        self.plate_confidences = defaultdict(list)  # 车牌文字 -> 各次识别的 OCR 置信度
+
+    def add(self, plate, confidence):
+        """ 加入一次识别结果 (空串忽略) """
+        if not plate:
+            return
+        weight = max(float(confidence), 1e-3)
+        self.readings += 1
+        self.total_weight += weight
+        self.length_votes[len(plate)] += weight
+        self.plate_confidences[plate].append(float(confidence))
+        while len(self.char_votes) < len(plate):
+            self.char_votes.append(defaultdict(float))
+        for position, char in enumerate(plate):
+            self.char_votes[position][char] += weight
+
+    def result(self):
+        """
+        当前投票结果
+        输出: (plate_number, agreement)，agreement 为各位字符得票占比的最小值
+        """
+        if not self.readings:
+            return '', 0.0
+        length = max(self.length_votes, key=self.length_votes.get)
+        chars = []
+        agreement = self.length_votes[length] / self.total_weight
+        for votes in self.char_votes[:length]:
+            char = max(votes, key=votes.get)
+            chars.append(char)
+            agreement = min(agreement, votes[char] / self.total_weight)
+        return ''.join(chars), agreement
+
+    def is_stable(self):
+        return self.readings >= self.min_readings and self.result()[1] >= self.threshold
+
+    def mean_confidence(self, plate):
+        """
+        读出 plate 的各次识别的平均 OCR 置信度，与单张图片的识别置信度含义相同
+        逐位投票得到的结果可能没有一次识别完全一致，此时取全部识别的平均值
+        """
+        scores = self.plate_confidences.get(plate) or [c for cs in self.plate_confidences.values() for c in cs]
+        return sum(scores) / len(scores) if scores else 0.0
+
+
+class Track:
+    """ 一辆车在连续帧中的车牌轨迹 """
+
+    def __init__(self, track_id, detection, frame_index):
+        self.track_id = track_id
+        self.detection = detection
+        self.box = list(detection.box)
+        self.born_frame = frame_index
+        self.last_frame = frame_index
+        self.hits = 1
+        self.missed = 0
+        self.plate = None
+        self.confidence = 0.0  # 投票胜出读数的平均 OCR 置信度
+        self.agreement = 0.0  # 投票一致度
+        self.ocr_calls = 0
+        self.consensus = None
+
+    def update(self, detection, frame_index):
+        self.detection = detection
+        self.box = list(detection.box)
+        self.last_frame = frame_index
+        self.hits += 1
+        self.missed = 0
+
+
+class PlateTracker:
+    """
+    基于 IoU / 中心距离的多目标车牌跟踪
+    把连续帧中的检测框关联成轨迹：每条轨迹的识别结果累积到 PlateConsensus 中投票，
+    投票稳定后确认车牌并停止对该轨迹识别；达到 max_ocr_attempts 仍未稳定时，
+    采用一致度不低于 min_agreement 的投票结果。同一辆车经过只上报一次；
+    车辆离开 (连续 max_missed 次未匹配) 后轨迹结束，同一车牌再次出现会作为新的一次通行。
+    """
+
+    def __init__(self, iou_threshold=0.3, max_center_distance=1.0, max_missed=10, max_ocr_attempts=6,
+                 consensus_threshold=0.75, min_readings=2, min_agreement=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance
+        self.max_missed = max_missed
+        self.max_ocr_attempts = max_ocr_attempts
+        self.consensus_threshold = consensus_threshold
+        self.min_readings = min_readings
+        self.min_agreement = min_agreement
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """ 清空所有轨迹和统计 """
+        with self._lock:
+            self.tracks = []
+            self.frame_index = 0
+            self._ids = itertools.count(1)
+            self.tracks_created = 0
+            self.ocr_calls = 0
+            self.confirmed = 0
+
+    def update(self, detections):
+        """
+        用一帧的检测结果更新轨迹
+        输入: [Detection(box, score, landmarks, layer), ...]
+        输出: 本帧匹配到或新建的轨迹列表
+        """
+        with self._lock:
+            self.frame_index += 1
+            candidates = []
+            for ti, track in enumerate(self.tracks):
+                for di, det in enumerate(detections):
+                    iou = box_iou(track.box, det.box)
+                    if iou >= self.iou_threshold:
+                        candidates.append((1.0 + iou, ti, di))
+                    else:
+                        # 抽帧间隔较大时车辆移动快，IoU 不足则退回中心距离匹配
+                        dist = _center_distance(track.box, det.box)
+                        if dist <= self.max_center_distance:
+                            candidates.append((1.0 - dist, ti, di))
+
+            matched_tracks, matched_dets = set(), set()
+            active = []
+            for _, ti, di in sorted(candidates, reverse=True):
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+                self.tracks[ti].update(detections[di], self.frame_index)
+                active.append(self.tracks[ti])
+
+            for ti, track in enumerate(self.tracks):
+                if ti not in matched_tracks:
+                    track.missed += 1
+            self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+
+            for di, det in enumerate(detections):
+                if di not in matched_dets:
+                    track = Track(next(self._ids), det, self.frame_index)
+                    track.consensus = PlateConsensus(self.consensus_threshold, self.min_readings)
+                    self.tracks.append(track)
+                    self.tracks_created += 1
+                    active.append(track)
+            return active
+
+    def needs_ocr(self, track):
+        """ 轨迹是否还需要做字符识别 """
+        return track.plate is None and track.ocr_calls < self.max_ocr_attempts
+
+    def submit_reading(self, track, plate, confidence):
+        """
+        回报一次字符识别结果
+        输出: True 表示该轨迹本次首次确认车牌 (需要上报)
+        """
+        with self._lock:
+            track.ocr_calls += 1
+            self.ocr_calls += 1
+            if track.plate is not None:
+                return False
+            track.consensus.add(plate, confidence)
+            consensus_plate, agreement = track.consensus.result()
+            if not track.consensus.is_stable():
+                # 识别次数用尽时退而采用多数结果
+                if track.ocr_calls < self.max_ocr_attempts or agreement < self.min_agreement:
+                    return False
+            track.plate = consensus_plate
+            track.confidence = track.consensus.mean_confidence(consensus_plate)
+            track.agreement = agreement
+            self.confirmed += 1
+            return True
+
+    def active_results(self):
+        """ 当前帧仍可见且已读出车牌的 [(plate_number, box), ...]，用于绘制 """
+        with self._lock:
+            return [(t.plate, t.box) for t in self.tracks
+                    if t.plate and t.last_frame == self.frame_index]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames": self.frame_index,
+                "active_tracks": len(self.tracks),
+                "tracks_created": self.tracks_created,
+                "confirmed": self.confirmed,
+                "ocr_calls": self.ocr_calls,
+                "ocr_per_track": self.ocr_calls / self.tracks_created if self.tracks_created else 0.0,
+            }
+
+
+class PlateDedupCache:
+    """
+    按时间窗去重的车牌缓存 (LRU + TTL)
+    以 (lane, plate_number) 为键记录最近一次出现时间：window 秒内重复出现视为同一次通行，
+    超过 window 后同一车牌再次出现会重新上报；重复出现会刷新时间，停在原地的车辆不会反复触发。
+    最多保留 max_size 个键，超出时淘汰最久未出现的车牌。所有操作均为 O(1) (过期清理为均摊 O(1))。
+    用于跟踪器之后：跟踪器保证同一轨迹只上报一次，本缓存处理轨迹断开后同一车辆再次被识别的情况。
+    同一个缓存只使用一种时钟：默认 clock (time.monotonic)，显式传入 now 时调用方需保证始终来自同一时间轴。
+    """
+
+    def __init__(self, window=60.0, max_size=1024, clock=time.monotonic):
+        self.window = window
+        self.max_size = max(1, int(max_size))
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._entries = OrderedDict()  # (lane, plate) -> 最近出现时间，按时间从旧到新排列
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def _expire(self, now):
+        """ 从最旧的一端清理过期的键 (只做内存回收，是否重复由 check 按各自的时间判断) """
+        while self._entries:
+            key, seen = next(iter(self._entries.items()))
+            if now - seen <= self.window:
+                break
+            self._entries.popitem(last=False)
+            self.expirations += 1
+
+    def check(self, plate_number, lane=None, now=None):
+        """
+        记录一次车牌出现
+        输出: True 表示应当上报 (新车牌或已超过时间窗)，False 表示时间窗内的重复
+        """
+        now = self.clock() if now is None else now
+        key = (lane, plate_number)
+        with self._lock:
+            self._expire(now)
+            # 按该键自己的最近出现时间判断，不依赖其他键的过期顺序
+            seen = self._entries.get(key)
+            duplicate = seen is not None and now - seen <= self.window
+            if seen is not None and not duplicate:
+                self.expirations += 1
+            self._entries[key] = now
+            self._entries.move_to_end(key)
+            if duplicate:
+                self.hits += 1
+                return False
+            self.misses += 1
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
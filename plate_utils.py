@@ -1,4 +1,11 @@
+import csv
+import json
+import os
+import queue
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
 
 
 def calculate_runtime(func, *args, **kwargs):
@@ -9,3 +16,264 @@ def calculate_runtime(func, *args, **kwargs):
     run_time = end_time - start_time
 
     return run_time, result
+
+
+_END = object()  # iter_batches 后台线程的结束标记
+
+
+def iter_batches(iterable, batch_size, max_wait=None):
+    """
+    将可迭代对象按批次输出
+    输入:
+        batch_size: 每批最多元素个数
+        max_wait: 一批从第一个元素到达起最长等待的秒数，到时即使没有新元素也立即输出当前批 (None 表示不限)
+                  batch_size > 1 时由后台线程读取 iterable，源长时间没有新元素 (摄像头画面静止、
+                  运动门控过滤) 时不足一批的部分也能按时输出；提前结束时请 close() 本生成器，
+                  会等待后台线程停止后再返回，之后才能安全释放 iterable 背后的资源
+    输出: 生成 List 批次，最后不足一批的部分也会输出
+    """
+    batch_size = max(1, int(batch_size))
+    if batch_size == 1 or max_wait is None:
+        # 每个元素单独成批或不限等待时间，不需要后台线程
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+
+    items = queue.Queue(maxsize=batch_size)
+    stop = threading.Event()
+
+    def _put(entry):
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed():
+        error = None
+        try:
+            for item in iterable:
+                if not _put((item, None)):
+                    return
+        except Exception as e:
+            error = e
+        _put((_END, error))
+
+    feeder = threading.Thread(target=_feed, name="batch-feeder", daemon=True)
+    feeder.start()
+    batch = []
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                if batch:
+                    item, error = items.get(timeout=max(0.0, deadline - time.perf_counter()))
+                else:
+                    item, error = items.get()
+            except queue.Empty:
+                # 等待超时，不足一批也立即输出
+                yield batch
+                batch = []
+                continue
+            if item is _END:
+                if batch:
+                    yield batch
+                if error is not None:
+                    raise error
+                return
+            if not batch:
+                deadline = time.perf_counter() + max_wait
+            batch.append(item)
+            if len(batch) >= batch_size or time.perf_counter() >= deadline:
+                yield batch
+                batch = []
+    finally:
+        stop.set()
+        feeder.join()
+
+
+STREAM_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://")
+
+
+def is_stream_url(source):
+    """ 是否为网络视频流地址 (RTSP / RTMP / HTTP MJPEG 等) """
+    return isinstance(source, str) and source.lower().startswith(STREAM_SCHEMES)
+
+
+# -------------------------------
+# 分阶段计时
+# -------------------------------
+# 识别流程各阶段 (按处理顺序)，STAGE_NAMES 为界面显示名称
+STAGES = ("decode", "detect", "draw", "crop", "db", "udp")
+STAGE_NAMES = {"decode": "解码", "detect": "检测识别", "draw": "绘制", "crop": "裁剪", "db": "数据库", "udp": "UDP"}
+
+
+class StageTimer:
+    """
+    一次处理的分阶段计时 (time.perf_counter)
+    处理过程中用 with timer.stage("detect"): ... 或 timer.add(name, seconds) 累计各阶段耗时，
+    只在实际运行中记录，不需要为了计时再跑一遍。每次运行新建一个计时器，运行结束后 stop()，
+    用 as_dict() 取出之后不再变化的快照保存或显示，不要在多次运行之间复用同一个计时器。
+    """
+
+    def __init__(self, label=""):
+        self.label = label
+        self.created = time.time()
+        self.stages = {}
+        self.total = 0.0
+        self._start = time.perf_counter()
+        self._stopped = False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def stop(self):
+        """ 结束计时，输出总耗时(秒) """
+        if not self._stopped:
+            self.total = time.perf_counter() - self._start
+            self._stopped = True
+        return self.total
+
+    def timed(self, iterable, name):
+        """ 包装迭代器，把每次取下一个元素的耗时计入 name 阶段 (用于解码等生成器) """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def elapsed(self):
+        """ 总耗时(秒)，未 stop() 时为到目前为止的耗时 """
+        return self.total if self._stopped else time.perf_counter() - self._start
+
+    def summary(self):
+        """ 界面显示用: "0.42秒 (解码 12ms | 检测识别 380ms | ...)" """
+        return format_timing(self.as_dict())
+
+    def as_dict(self):
+        """ 当前计时的快照 (新建的字典，之后计时器的变化不会影响它) """
+        return {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created)),
+            "label": self.label,
+            "total": round(self.elapsed(), 6),
+            "stages": {name: round(self.stages[name], 6) for name in sorted(self.stages, key=_stage_order)},
+        }
+
+
+def format_timing(record):
+    """ 把 StageTimer.as_dict() 快照格式化为 "0.42秒 (解码 12ms | 检测识别 380ms | ...)" """
+    parts = [f"{STAGE_NAMES.get(name, name)} {seconds * 1000:.0f}ms" for name, seconds in record["stages"].items()]
+    return f"{record['total']:.2f}秒 ({' | '.join(parts)})" if parts else f"{record['total']:.2f}秒"
+
+
+def _stage_order(name):
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+class TimingHistory:
+    """ 最近 max_size 次处理的分阶段计时记录 (追加时保存快照)，可导出为 CSV 或 JSON """
+
+    def __init__(self, max_size=1000):
+        self._records = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def append(self, timer):
+        """ 保存一次已结束运行的计时快照 (StageTimer 或其 as_dict() 结果) """
+        record = timer.as_dict() if isinstance(timer, StageTimer) else dict(timer, stages=dict(timer["stages"]))
+        with self._lock:
+            self._records.append(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        with self._lock:
+            return [dict(record, stages=dict(record["stages"])) for record in self._records]
+
+    def export(self, path):
+        """
+        导出计时记录，按扩展名选择格式
+        .json 输出记录列表；其余输出 CSV (time, label, total, 各阶段秒数)
+        输出: 导出的记录条数
+        """
+        records = self.records()
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+            return len(records)
+
+        extra = sorted({name for r in records for name in r["stages"]} - set(STAGES))
+        columns = list(STAGES) + extra
+        # utf-8-sig 便于 Excel 直接打开中文文件名
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "label", "total"] + columns)
+            for r in records:
+                writer.writerow([r["time"], r["label"], r["total"]] + [r["stages"].get(name, "") for name in columns])
+        return len(records)
+
+
+# -------------------------------
+# JSONL 断点文件
+# -------------------------------
+# 第一行为参数头，其后每完成一项追加一行记录；batch_cli 与 video_segments 共用
+def truncate_partial_line(path):
+    """ 截掉崩溃时写了一半的最后一行，之后追加的记录才会从新的一行开始 """
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_checkpoint(checkpoint, header):
+    """
+    读取断点文件中已完成的记录
+    输出: 记录列表 (不含参数头)，文件不存在时为 []；参数头与 header 不一致或无法解析时为 None (重新处理)。
+          崩溃时写了一半的最后一行被截掉
+    """
+    if not checkpoint or not os.path.exists(checkpoint):
+        return []
+    truncate_partial_line(checkpoint)
+    with open(checkpoint, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    try:
+        if json.loads(lines[0]) != header:
+            print(f"[警告] 断点文件与当前参数不一致，重新处理: {checkpoint}")
+            return None
+    except (IndexError, ValueError):
+        return None
+    records = []
+    for line in lines[1:]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def append_checkpoint(f, record):
+    """ 追加一条记录并立即落盘 """
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
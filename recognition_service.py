@@ -0,0 +1,266 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+import plate_recognition
+
+
+# -------------------------------
+# 子进程函数
+# -------------------------------
+_frame_ring = None
+READY_TIMEOUT = 120.0  # 等待所有子进程加载模型的最长时间(秒)
+
+
+def _worker_init(num_instances, detect_level, frame_ring=None, ready=None):
+    """
+    子进程启动时加载自己的识别引擎，并附加共享帧缓冲
+    ready 为 Semaphore 时加载完成后 release 一次，主进程据此确认每个进程 (而不只是某一个) 都已就绪
+    """
+    global _frame_ring
+    _frame_ring = frame_ring
+    plate_recognition.init_engine(num_instances, detect_level=detect_level)
+    if ready is not None:
+        ready.release()
+
+
+def _worker_recognize(frame):
+    return plate_recognition.get_engine().recognize(frame)
+
+
+def _worker_slot(slot, seq, detect, detect_width, release):
+    """ 直接在共享内存槽位上识别 (或只检测)，release 为 True 时完成后释放槽位 """
+    try:
+        if _frame_ring.seq(slot) != seq:
+            raise RuntimeError(f"槽位 {slot} 已被覆盖 (期望序号 {seq})")
+        engine = plate_recognition.get_engine()
+        frame = _frame_ring.view(slot)
+        if detect:
+            return plate_recognition.detect_frames([frame], engine, detect_width)[0]
+        return engine.recognize(frame)
+    finally:
+        if release:
+            _frame_ring.release(slot)
+
+
+def _worker_recognize_batch(frames):
+    return plate_recognition.get_engine().recognize_batch(frames)
+
+
+def _worker_detect(frame):
+    return plate_recognition.get_engine().detect(frame)
+
+
+def _worker_read_plate(frame, detection):
+    return plate_recognition.get_engine().read_plate(frame, detection)
+
+
+# -------------------------------
+# 多进程识别服务
+# -------------------------------
+class RecognitionService:
+    """
+    多进程车牌识别服务
+    启动 num_workers 个子进程，每个子进程持有独立的模型实例，充分利用多核 CPU。
+    submit() 返回 Future；同时在途的任务数不超过 max_inflight，超过时 submit 阻塞。
+    同时实现 recognize/recognize_batch，可通过 plate_recognition.set_engine 替换全局引擎，
+    GUI 与 process_source 无需改动即可使用。
+    传入 frame_ring (SharedFrameRing) 后可用 submit_slot 提交共享内存中的帧，避免跨进程复制。
+    """
+
+    def __init__(self, num_workers=None, max_inflight=None, instances_per_worker=1,
+                 detect_level=plate_recognition.lpr3.DETECT_LEVEL_LOW, frame_ring=None):
+        self.num_workers = max(1, int(num_workers or os.cpu_count() or 1))
+        self.max_inflight = max(1, int(max_inflight or self.num_workers * 2))
+        self.instances_per_worker = instances_per_worker
+        self.detect_level = detect_level
+        self.frame_ring = frame_ring
+        self._executor = None
+        self._inflight = threading.BoundedSemaphore(self.max_inflight)
+        self._start_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._executor is not None
+
+    def start(self):
+        """ 启动子进程并等待各进程完成模型加载 """
+        with self._start_lock:
+            if self._executor is not None:
+                return self
+            start_time = time.perf_counter()
+            # spawn 方式与 Windows 行为一致，也避免 fork 继承父进程中的 ONNX 会话
+            context = multiprocessing.get_context("spawn")
+            ready = context.Semaphore(0)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=context,
+                initializer=_worker_init,
+                initargs=(self.instances_per_worker, self.detect_level, self.frame_ring, ready),
+            )
+            # 提交任务才会创建子进程，每个空任务保证启动一个进程；空任务可能被同一个进程处理，
+            # 因此等每个进程都报告加载完成后才返回，确保模型在首个真实请求前全部就绪
+            warmups = [self._executor.submit(_worker_recognize_batch, []) for _ in range(self.num_workers)]
+            try:
+                self._wait_ready(ready, warmups)
+            except Exception:
+                executor, self._executor = self._executor, None
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            print(f"[信息] 识别服务启动完成: {self.num_workers} 个进程, "
+                  f"耗时 {time.perf_counter() - start_time:.2f}秒")
+        return self
+
+    load = start
+
+    def _wait_ready(self, ready, warmups):
+        deadline = time.monotonic() + READY_TIMEOUT
+        for _ in range(self.num_workers):
+            while not ready.acquire(timeout=0.2):
+                for future in warmups:
+                    if future.done():
+                        future.result()  # 子进程初始化失败 (进程池损坏) 时抛出异常
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"识别服务启动超时: {READY_TIMEOUT:.0f} 秒内未能加载全部 "
+                                       f"{self.num_workers} 个进程")
+
+    def close(self):
+        """ 关闭子进程 """
+        with self._start_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _submit(self, fn, *args):
+        if self._executor is None:
+            self.start()
+        self._inflight.acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._inflight.release()
+            raise
+        future.add_done_callback(lambda _: self._inflight.release())
+        return future
+
+    def submit(self, frame):
+        """
+        提交一帧识别任务 (在途任务已满时阻塞)
+        输出: Future, 结果为 hyperlpr3 原始结果 [(code, conf, type_idx, box), ...]
+        """
+        return self._submit(_worker_recognize, frame)
+
+    def submit_slot(self, slot, seq, detect=False, detect_width=None, release=True):
+        """
+        提交共享帧缓冲中已 acquire 的槽位，子进程原地读取，不跨进程复制整帧
+        输入:
+            detect: True 时只检测 (结果为 [Detection, ...]，可交给 process_frame 做跟踪和字符识别)
+            detect_width: 检测宽度 (分辨率金字塔)，仅 detect 时有效
+            release: True 时子进程完成后 release 槽位；False 时由提交方在用完槽位后自行 release
+        输出: Future, 结果同 submit (detect 时为检测结果)
+        """
+        if self.frame_ring is None:
+            raise RuntimeError("识别服务未配置共享帧缓冲")
+        return self._submit(_worker_slot, slot, seq, detect, detect_width, release)
+
+    def imap(self, frames, ordered=True):
+        """
+        流式识别多帧
+        输入: frames 可迭代的帧序列, ordered 是否按输入顺序输出
+        输出: 生成 (index, results)
+        """
+        pending = deque()
+        for index, frame in enumerate(frames):
+            # 在途任务达到上限时先交付已完成的结果，避免 submit 阻塞导致无法消费
+            while len(pending) >= self.max_inflight:
+                yield from self._drain(pending, ordered, 1)
+            pending.append((index, self.submit(frame)))
+        yield from self._drain(pending, ordered, len(pending))
+
+    @staticmethod
+    def _drain(pending, ordered, count):
+        if ordered:
+            for _ in range(count):
+                index, future = pending.popleft()
+                yield index, future.result()
+            return
+
+        by_future = {future: index for index, future in pending}
+        done = 0
+        for future in as_completed(by_future):
+            pending.remove((by_future[future], future))
+            yield by_future[future], future.result()
+            done += 1
+            if done >= count:
+                break
+
+    # ---- 与 RecognizerEngine 相同的接口 ----
+    def recognize(self, frame, timeout=None):
+        return self.submit(frame).result(timeout=timeout)
+
+    def recognize_batch(self, frames):
+        results = [None] * len(frames)
+        for index, frame_results in self.imap(frames, ordered=False):
+            results[index] = frame_results
+        return results
+
+    def detect(self, frame, timeout=None):
+        return self._submit(_worker_detect, frame).result(timeout=timeout)
+
+    def detect_batch(self, frames):
+        futures = [self._submit(_worker_detect, frame) for frame in frames]
+        return [future.result() for future in futures]
+
+    def read_plate(self, frame, detection, timeout=None):
+        # 只把车牌所在区域传给子进程，避免复制整帧
+        x1, y1, x2, y2 = detection.box
+        h, w = frame.shape[:2]
+        margin = max(4, (x2 - x1) // 4)
+        left, top = max(0, x1 - margin), max(0, y1 - margin)
+        region = frame[top:min(h, y2 + margin), left:min(w, x2 + margin)]
+        local = detection._replace(landmarks=detection.landmarks - np.array([left, top]))
+        return self._submit(_worker_read_plate, region, local).result(timeout=timeout)
+
+
+# -------------------------------
+# 无界面批量识别
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="多进程批量识别图片中的车牌")
+    parser.add_argument("images", nargs="+", help="图片路径")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="识别进程数 (默认 CPU 核数)")
+    parser.add_argument("--unordered", action="store_true", help="按完成顺序输出结果")
+    args = parser.parse_args()
+
+    readable_paths = []
+
+    def _frames():
+        for path in args.images:
+            img = cv2.imread(path)
+            if img is None:
+                print("[错误] 无法读取图片:", path)
+                continue
+            readable_paths.append(path)
+            yield img
+
+    with RecognitionService(num_workers=args.workers) as service:
+        for index, results in service.imap(_frames(), ordered=not args.unordered):
+            plates = ", ".join(code for code, conf, type_idx, box in results) or "-"
+            print(f"{readable_paths[index]}\t{plates}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import threading
+import time
+
+import cv2
+
+from frame_capture import CaptureThread, open_video_capture
+from plate_utils import is_stream_url
+
+
+def open_network_capture(url, open_timeout=5.0, read_timeout=5.0):
+    """
+    打开网络视频流 (RTSP / HTTP MJPEG)
+    设置连接/读取超时，断流时 read() 会超时返回而不是一直阻塞；解码缓冲只保留 1 帧
+    选项都随本次打开传入，不修改进程级环境变量 (OPENCV_FFMPEG_CAPTURE_OPTIONS)，
+    连接阻塞时不影响其他线程打开视频文件；未设置该变量时 OpenCV 默认以 TCP 传输 RTSP
+    """
+    params = []
+    if hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(open_timeout * 1000),
+                  cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(read_timeout * 1000)]
+    try:
+        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+    except TypeError:
+        # 旧版 OpenCV 不支持打开参数
+        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class SimulatedStream:
+    """
+    用本地视频文件模拟网络摄像头 (测试用)
+    按视频帧率实时出帧 (读取慢时帧会积压，模拟解码器缓冲)，frame_time 为该帧"拍摄"时刻；
+    可在第 stall_at 帧卡住 stall_seconds 秒后读取失败，或在 disconnect_after 帧后断开连接。
+    接口与 cv2.VideoCapture 相同，可作为 StreamReader 的 opener 返回值。
+    """
+
+    def __init__(self, path, fps=None, loop=True, stall_at=None, stall_seconds=0.0, disconnect_after=None):
+        self.path = path
+        self._cap = open_video_capture(path)
+        self.fps = fps or self._cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.loop = loop
+        self.stall_at = stall_at
+        self.stall_seconds = stall_seconds
+        self.disconnect_after = disconnect_after
+        self.frames = 0
+        self.frame_time = None
+        self._start = time.time()
+
+    def isOpened(self):
+        return self._cap is not None and self._cap.isOpened()
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self._cap.get(prop_id) if self._cap is not None else 0
+
+    def set(self, prop_id, value):
+        return False
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        if self.disconnect_after is not None and self.frames >= self.disconnect_after:
+            self.release()
+            return False, None
+        if self.stall_at is not None and self.frames == self.stall_at:
+            self.stall_at = None
+            time.sleep(self.stall_seconds)
+            return False, None  # 等同于读取超时
+
+        due = self._start + self.frames / self.fps
+        delay = due - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        ret, frame = self._cap.read()
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        if not ret:
+            return False, None
+        self.frame_time = due
+        self.frames += 1
+        return True, frame
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+
+class StreamReader(CaptureThread):
+    """
+    网络视频流读取线程
+    在 CaptureThread 的基础上：读取线程持续把解码器中的帧读空，订阅方永远拿到最新帧而不是积压的旧帧；
+    超过 stall_timeout 秒没有新帧视为卡流，断开后按指数退避 (backoff_initial ~ backoff_max 秒) 自动重连，
+    不需要重启程序。stats() 中报告连接状态、重连/卡流次数和各订阅方取帧时的帧龄。
+    opener 返回一个类 VideoCapture 对象，默认 open_network_capture(url)，测试时可传入 SimulatedStream。
+    首次连接也在读取线程中进行，失败时同样按退避重试，start() 不会阻塞调用方。
+    """
+
+    auto_reconnect = True
+
+    def __init__(self, url, opener=None, stall_timeout=3.0, backoff_initial=0.5, backoff_max=30.0):
+        super().__init__(url)
+        self.opener = opener or (lambda: open_network_capture(url))
+        self.stall_timeout = stall_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.connected = False
+        self.reconnects = 0
+        self.stalls = 0
+        self._last_frame = None
+
+    def open(self):
+        cap = self.opener()
+        with self._cap_lock:
+            if self.cap is not None:
+                self.cap.release()
+            self.cap = cap
+        self.connected = cap.isOpened()
+        if self.connected:
+            self._last_frame = time.monotonic()
+        return self.connected
+
+    def isOpened(self):
+        return self.connected
+
+    def start(self):
+        """ 启动读取线程，连接 (含首次连接) 与重连都在线程中进行 """
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="stream-reader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _sleep(self, seconds):
+        """ 可被 stop() 打断的等待 """
+        end = time.monotonic() + seconds
+        while self._running and time.monotonic() < end:
+            time.sleep(min(0.1, end - time.monotonic()))
+
+    def _run(self):
+        backoff = self.backoff_initial
+        while self._running:
+            if not self.connected:
+                first = self._last_frame is None
+                if not first:
+                    print(f"[信息] 重新连接视频流: {self.source}")
+                if self.open():
+                    backoff = self.backoff_initial
+                    if first:
+                        print(f"[信息] 视频流已连接: {self.source}")
+                    else:
+                        self.reconnects += 1
+                        print(f"[信息] 视频流已重连 (第 {self.reconnects} 次)")
+                else:
+                    print(f"[警告] 无法连接视频流，{backoff:.1f} 秒后重试: {self.source}")
+                    self._sleep(backoff)
+                    backoff = min(backoff * 2, self.backoff_max)
+                continue
+
+            with self._cap_lock:
+                # stop() 可能在 read() 阻塞期间已释放连接
+                cap = self.cap
+                if cap is None or not self._running:
+                    break
+                ret, frame = cap.read()
+                opened = cap.isOpened()
+            if ret:
+                self._last_frame = time.monotonic()
+                self._publish(frame, getattr(cap, "frame_time", None))
+                continue
+
+            if not opened or time.monotonic() - self._last_frame > self.stall_timeout:
+                self.stalls += 1
+                self.connected = False
+                print(f"[警告] 视频流中断或卡顿超过 {self.stall_timeout:.1f} 秒，准备重连: {self.source}")
+            else:
+                time.sleep(0.01)
+
+        # stop() 返回后才建立完成的连接由读取线程自己释放
+        with self._cap_lock:
+            if not self._running and self.cap is not None:
+                self.cap.release()
+                self.cap = None
+
+    def stop(self):
+        super().stop()
+        self.connected = False
+
+    @property
+    def stalled(self):
+        """ 当前是否已超过 stall_timeout 没有收到新帧 """
+        return self._last_frame is None or time.monotonic() - self._last_frame > self.stall_timeout
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({
+            "connected": self.connected,
+            "stalled": self.stalled,
+            "reconnects": self.reconnects,
+            "stalls": self.stalls,
+            "last_frame_ago": time.monotonic() - self._last_frame if self._last_frame is not None else None,
+        })
+        return stats
+
+
+def open_capture(source, **kwargs):
+    """ 按视频源类型创建采集线程：网络流地址使用 StreamReader，其余 (摄像头索引/文件) 使用 CaptureThread """
+    if is_stream_url(source):
+        return StreamReader(source, **kwargs)
+    return CaptureThread(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="网络视频流读取测试 (帧率、帧龄、重连)")
+    parser.add_argument("source", help="rtsp:// / http:// 地址，或配合 --simulate 使用的本地视频文件")
+    parser.add_argument("--simulate", action="store_true", help="用本地视频文件模拟网络摄像头")
+    parser.add_argument("--stall-at", type=int, default=None, help="模拟: 第几帧开始卡流")
+    parser.add_argument("--stall-seconds", type=float, default=5.0, help="模拟: 卡流时长(秒)")
+    parser.add_argument("--consumer-delay", type=float, default=0.1, help="模拟识别耗时(秒)")
+    parser.add_argument("--duration", type=float, default=20.0, help="运行时长(秒)")
+    args = parser.parse_args()
+
+    if args.simulate:
+        first = [True]
+
+        def _opener():
+            # 只有第一次连接会卡流，重连后恢复正常
+            stall_at = args.stall_at if first[0] else None
+            first[0] = False
+            return SimulatedStream(args.source, stall_at=stall_at, stall_seconds=args.stall_seconds)
+
+        reader = StreamReader(args.source, opener=_opener)
+    else:
+        reader = StreamReader(args.source)
+
+    slot = reader.subscribe("consumer")
+    reader.start()
+    end = time.monotonic() + args.duration
+    last_report = time.monotonic()
+    try:
+        while time.monotonic() < end:
+            if slot.get(timeout=0.5) is not None:
+                time.sleep(args.consumer_delay)
+            if time.monotonic() - last_report >= 1.0:
+                last_report = time.monotonic()
+                s = reader.stats()
+                consumer = s["subscribers"]["consumer"]
+                print(f"采集 {s['capture_fps']:.1f} FPS | 帧龄 {consumer['age_ms']:.0f}ms | "
+                      f"丢帧 {consumer['dropped']} | 连接 {'是' if s['connected'] else '否'} | "
+                      f"卡流 {s['stalls']} | 重连 {s['reconnects']}")
+    finally:
+        reader.stop()
+
+
+if __name__ == "__main__":
+    main()
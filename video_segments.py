@@ -0,0 +1,199 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+import plate_recognition
+from plate_tracker import PlateTracker
+from plate_utils import append_checkpoint, load_checkpoint
+
+
+# -------------------------------
+# 分段
+# -------------------------------
+def plan_segments(path, segment_seconds=300.0, overlap_seconds=2.0):
+    """
+    按时长把视频切成若干段
+    每段向后多处理 overlap_seconds，跨段经过的车辆在两段中都能被完整跟踪，重复结果在合并时去除
+    输出: [{"index", "start_frame", "end_frame", "fps"}, ...]，end_frame 不含
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        raise IOError(f"无法获取视频帧数: {path}")
+
+    length = max(1, int(round(segment_seconds * fps)))
+    overlap = int(round(overlap_seconds * fps))
+    segments = []
+    for index, start in enumerate(range(0, total, length)):
+        segments.append({
+            "index": index,
+            "start_frame": start,
+            "end_frame": min(total, start + length + overlap),
+            "fps": fps,
+        })
+    return segments
+
+
+# -------------------------------
+# 子进程函数
+# -------------------------------
+def process_segment(path, segment, frame_skip=5, scan_mode="grab", detect_width=None):
+    """
+    识别一段视频 (在子进程中运行)
+    帧号按整段视频从 1 开始计，与单进程 process_source 的抽帧位置一致
+    输出: (segment_index, [{"frame", "time", "plate", "confidence", "box"}, ...])
+    """
+    start, end, fps = segment["start_frame"], segment["end_frame"], segment["fps"]
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频: {path}")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    engine = plate_recognition.get_engine()
+    tracker = PlateTracker()
+    fast = scan_mode != "decode"
+    events = []
+    frame_index = start
+    while frame_index < end:
+        frame_index += 1
+        if frame_index % frame_skip != 0:
+            # 跳过的帧只 grab 不解码
+            ok = cap.grab() if fast else cap.read()[0]
+            if not ok:
+                break
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        detections = plate_recognition.detect_frames([frame], engine, detect_width)[0]
+        for code, conf, box in plate_recognition.track_frame(frame, tracker, engine, detections,
+                                                             with_confidence=True):
+            events.append({
+                "frame": frame_index,
+                "time": round((frame_index - 1) / fps, 3),
+                "plate": code,
+                "confidence": round(float(conf), 4),
+                "box": [int(v) for v in box],
+            })
+    cap.release()
+    return segment["index"], events
+
+
+# -------------------------------
+# 合并与断点续传
+# -------------------------------
+def merge_timeline(segment_events, dedup_seconds=10.0):
+    """
+    合并各段结果为按时间排序的车牌时间线
+    同一车牌在 dedup_seconds 内重复出现 (重叠区或相邻段) 只保留一次，取置信度较高的记录
+    """
+    events = sorted((e for seg in segment_events for e in seg), key=lambda e: e["time"])
+    timeline = []
+    last_seen = {}  # plate -> (timeline 中的位置, 最近出现时间)
+    for event in events:
+        seen = last_seen.get(event["plate"])
+        if seen is not None and event["time"] - seen[1] <= dedup_seconds:
+            position = seen[0]
+            if event["confidence"] > timeline[position]["confidence"]:
+                timeline[position] = dict(event, time=timeline[position]["time"],
+                                          frame=timeline[position]["frame"])
+            last_seen[event["plate"]] = (position, event["time"])
+            continue
+        last_seen[event["plate"]] = (len(timeline), event["time"])
+        timeline.append(event)
+    return timeline
+
+
+def _checkpoint_header(path, segment_seconds, overlap_seconds, frame_skip, scan_mode, detect_width, detect_level):
+    """ 影响识别结果的全部参数，任一项不同都不能续传 """
+    return {
+        "source": os.path.abspath(path),
+        "size": os.path.getsize(path),
+        "segment_seconds": segment_seconds,
+        "overlap_seconds": overlap_seconds,
+        "frame_skip": frame_skip,
+        "scan_mode": scan_mode,
+        "detect_width": detect_width,
+        "detect_level": int(detect_level),
+    }
+
+
+def process_video_parallel(path, workers=None, segment_seconds=300.0, overlap_seconds=2.0, frame_skip=5,
+                           scan_mode="grab", detect_width=None, checkpoint=None, dedup_seconds=10.0,
+                           detect_level=plate_recognition.lpr3.DETECT_LEVEL_LOW):
+    """
+    多进程分段识别长视频
+    输入:
+        workers: 进程数 (默认 CPU 核数)，每个进程独立 seek 和加载识别引擎
+        segment_seconds / overlap_seconds: 分段时长与段间重叠
+        checkpoint: 断点文件路径 (JSONL)，每完成一段追加一行；重新运行时跳过已完成的段
+        dedup_seconds: 合并时同一车牌的去重时间窗
+    输出: 按时间排序的 [{"frame", "time", "plate", "confidence", "box"}, ...]
+    """
+    segments = plan_segments(path, segment_seconds, overlap_seconds)
+    header = _checkpoint_header(path, segment_seconds, overlap_seconds, frame_skip, scan_mode, detect_width,
+                                detect_level)
+    records = load_checkpoint(checkpoint, header)
+    fresh = not records
+    done = {r["segment"]: r["events"] for r in records or []}
+    pending = [seg for seg in segments if seg["index"] not in done]
+    workers = max(1, min(int(workers or os.cpu_count() or 1), len(pending) or 1))
+    print(f"[信息] 视频共 {len(segments)} 段, 已完成 {len(done)} 段, 使用 {workers} 个进程")
+
+    checkpoint_file = None
+    if checkpoint:
+        checkpoint_file = open(checkpoint, "w" if fresh else "a", encoding="utf-8")
+        if fresh:
+            append_checkpoint(checkpoint_file, header)
+
+    start_time = time.perf_counter()
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=plate_recognition.init_engine, initargs=(1, detect_level)) as executor:
+                futures = [executor.submit(process_segment, path, seg, frame_skip, scan_mode, detect_width)
+                           for seg in pending]
+                for future in as_completed(futures):
+                    index, events = future.result()
+                    done[index] = events
+                    if checkpoint_file is not None:
+                        append_checkpoint(checkpoint_file, {"segment": index, "events": events})
+                    print(f"[信息] 第 {index + 1}/{len(segments)} 段完成, 识别到 {len(events)} 个车牌, "
+                          f"进度 {len(done)}/{len(segments)}")
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    timeline = merge_timeline([done[seg["index"]] for seg in segments], dedup_seconds)
+    print(f"[信息] 分段识别完成: {len(timeline)} 个车牌, 耗时 {time.perf_counter() - start_time:.2f}秒")
+    return timeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程分段识别长视频中的车牌")
+    parser.add_argument("video", help="视频路径")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--segment", type=float, default=300.0, help="分段时长(秒)")
+    parser.add_argument("--frame-skip", type=int, default=5, help="每隔多少帧识别一次")
+    parser.add_argument("--detect-width", type=int, default=None, help="检测模型输入的最大宽度")
+    parser.add_argument("--checkpoint", default=None, help="断点文件 (JSONL)，中断后重新运行可续传")
+    args = parser.parse_args()
+
+    timeline = process_video_parallel(args.video, workers=args.workers, segment_seconds=args.segment,
+                                      frame_skip=args.frame_skip, detect_width=args.detect_width,
+                                      checkpoint=args.checkpoint)
+    for event in timeline:
+        print(f"{time.strftime('%H:%M:%S', time.gmtime(event['time']))}\t{event['plate']}\t"
+              f"{event['confidence']:.2f}")
+
+
+if __name__ == "__main__":
+    main()